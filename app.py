@@ -2,17 +2,33 @@ from flask import Flask, render_template, request, jsonify, redirect, url_for, f
 from flask_cors import CORS
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 import numpy as np
-from models.diabetes_model import DiabetesModel
-from models.cancer_model import CancerModel
-from models.heart_model import HeartModel
-from models.sample_data import train_models
-from models.database import db, User, Prediction, ModelMetrics, TrainingHistory, init_db
+from models.artifacts import load_artifacts, build_artifacts, ArtifactWatcher
+from models.registry import MODEL_SPECS, ModelRegistry
+from models.incremental import update_artifacts
+from models.bulk_scoring import score_file, print_summary
+from models.database import (
+    db, User, Prediction, PredictionRollup, ModelMetrics, TrainingHistory, RetrainJob, init_db,
+    migrate_prediction_features, backfill_rollups, pool_stats, save_predictions, claim_retrain_job
+)
 from utils.helpers import (
     validate_input_features,
+    validate_batch_features,
     format_prediction_result,
-    create_model_directory
+    format_batch_results,
+    encode_cursor,
+    decode_cursor
 )
+from utils.write_behind import PredictionWriter
+from utils.micro_batch import MicroBatcher
+from utils.prediction_cache import PredictionCache
+from utils.metrics import Metrics
+from utils.fast_json import json_response, body_features
 import os
+import threading
+import time
+import click
+from functools import partial
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -25,6 +41,51 @@ CORS(app)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///medical.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Database performance profile applied by init_db; 'default' keeps SQLAlchemy's own settings
+app.config['DATABASE_PROFILE'] = os.getenv('DATABASE_PROFILE', 'tuned')
+app.config['DATABASE_POOL_SIZE'] = int(os.getenv('DATABASE_POOL_SIZE', '5'))
+app.config['DATABASE_MAX_OVERFLOW'] = int(os.getenv('DATABASE_MAX_OVERFLOW', '10'))
+app.config['DATABASE_POOL_TIMEOUT'] = float(os.getenv('DATABASE_POOL_TIMEOUT', '30'))
+app.config['DATABASE_POOL_RECYCLE'] = int(os.getenv('DATABASE_POOL_RECYCLE', '1800'))
+app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+app.config['MAX_BATCH_SIZE'] = int(os.getenv('MAX_BATCH_SIZE', '10000'))
+# 'sync' commits predictions before responding; 'async' writes them behind in bulk
+app.config['PREDICTION_WRITE_MODE'] = os.getenv('PREDICTION_WRITE_MODE', 'sync')
+app.config['PREDICTION_QUEUE_SIZE'] = int(os.getenv('PREDICTION_QUEUE_SIZE', '10000'))
+app.config['PREDICTION_FLUSH_SIZE'] = int(os.getenv('PREDICTION_FLUSH_SIZE', '500'))
+app.config['PREDICTION_FLUSH_INTERVAL'] = float(os.getenv('PREDICTION_FLUSH_INTERVAL', '0.5'))
+app.config['PREDICTION_FLUSH_RETRIES'] = int(os.getenv('PREDICTION_FLUSH_RETRIES', '5'))
+# Coalesce concurrent single-row predictions into batched predict_proba calls
+app.config['MICRO_BATCH_ENABLED'] = os.getenv('MICRO_BATCH_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+app.config['MICRO_BATCH_MAX_SIZE'] = int(os.getenv('MICRO_BATCH_MAX_SIZE', '64'))
+app.config['MICRO_BATCH_MAX_WAIT_MS'] = float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', '2'))
+# Cache repeat predictions per model version; a size of 0 disables the cache
+app.config['PREDICTION_CACHE_SIZE'] = int(os.getenv('PREDICTION_CACHE_SIZE', '4096'))
+app.config['PREDICTION_CACHE_TTL'] = float(os.getenv('PREDICTION_CACHE_TTL', '300'))
+# Model variant served when a request does not pick one with ?variant=full|fast
+app.config['MODEL_VARIANT'] = os.getenv('MODEL_VARIANT', 'full')
+# Stop evaluating trees once a prediction's class is settled: 'off', 'exact' (never changes the
+# predicted class) or 'hoeffding' (statistical bound, wrong with probability at most EARLY_EXIT_DELTA)
+app.config['EARLY_EXIT'] = os.getenv('EARLY_EXIT', 'off').lower()
+app.config['EARLY_EXIT_DELTA'] = float(os.getenv('EARLY_EXIT_DELTA', '0.01'))
+# Per-prediction explanations (?explain=true): time allowed per request, and cached single-row results
+app.config['EXPLAIN_BUDGET_MS'] = float(os.getenv('EXPLAIN_BUDGET_MS', '50'))
+app.config['EXPLAIN_CACHE_SIZE'] = int(os.getenv('EXPLAIN_CACHE_SIZE', '1024'))
+# How often each worker checks for artifacts published by a retrain in another worker
+app.config['MODEL_RELOAD_INTERVAL'] = float(os.getenv('MODEL_RELOAD_INTERVAL', '5'))
+# Running retrain jobs older than this are treated as abandoned
+app.config['RETRAIN_JOB_TIMEOUT'] = int(os.getenv('RETRAIN_JOB_TIMEOUT', '3600'))
+app.config['HISTORY_PAGE_SIZE'] = int(os.getenv('HISTORY_PAGE_SIZE', '50'))
+app.config['HISTORY_MAX_PAGE_SIZE'] = int(os.getenv('HISTORY_MAX_PAGE_SIZE', '200'))
+# Directory shared by all workers so /metrics reports server-wide totals; unset keeps them per process
+app.config['METRICS_DIR'] = os.getenv('METRICS_DIR')
+app.config['METRICS_FLUSH_INTERVAL'] = float(os.getenv('METRICS_FLUSH_INTERVAL', '1'))
+
+# Columns the history API can project; features is the large one and must be asked for
+HISTORY_FIELDS = ('id', 'created_at', 'model_type', 'prediction', 'probability', 'outcome', 'features')
+HISTORY_DEFAULT_FIELDS = ('id', 'created_at', 'model_type', 'prediction', 'probability')
 
 # Initialize Flask-Login
 login_manager = LoginManager()
@@ -34,60 +95,280 @@ login_manager.login_view = 'login'
 # Initialize database
 init_db(app)
 
-# Initialize global variables for models
-diabetes_model = None
-cancer_model = None
-heart_model = None
+metrics = Metrics(
+    directory=app.config['METRICS_DIR'],
+    flush_interval=app.config['METRICS_FLUSH_INTERVAL']
+)
+
+# Persist prediction audit rows through a write-behind buffer
+prediction_writer = PredictionWriter(
+    app,
+    mode=app.config['PREDICTION_WRITE_MODE'],
+    max_queue=app.config['PREDICTION_QUEUE_SIZE'],
+    flush_size=app.config['PREDICTION_FLUSH_SIZE'],
+    flush_interval=app.config['PREDICTION_FLUSH_INTERVAL'],
+    flush_retries=app.config['PREDICTION_FLUSH_RETRIES'],
+    metrics=metrics
+)
+
+prediction_cache = PredictionCache(
+    maxsize=app.config['PREDICTION_CACHE_SIZE'],
+    ttl=app.config['PREDICTION_CACHE_TTL']
+)
+explanation_cache = PredictionCache(
+    maxsize=app.config['EXPLAIN_CACHE_SIZE'],
+    ttl=app.config['PREDICTION_CACHE_TTL']
+)
+
+# Models being served, with their per-model metadata; loaded on first use
+model_registry = ModelRegistry(loader=lambda: load_models())
 training_stats = None
+artifact_version = None
+
+models_lock = threading.Lock()
+artifact_watcher = ArtifactWatcher(interval=app.config['MODEL_RELOAD_INTERVAL'])
+reload_in_progress = threading.Event()
 
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
-def load_models():
-    """Load or initialize ML models"""
-    global diabetes_model, cancer_model, heart_model, training_stats
+def install_models(loaded, stats, manifest):
+    """Atomically swap in a fully loaded set of models"""
+    global training_stats, artifact_version
     
-    # Create models directory if it doesn't exist
-    create_model_directory()
-    
-    # Initialize models
-    diabetes_model = DiabetesModel()
-    cancer_model = CancerModel()
-    heart_model = HeartModel()
+    with models_lock:
+        model_registry.install(loaded, stats)
+        training_stats = stats
+        artifact_version = manifest['version']
+    prediction_cache.clear()
+    explanation_cache.clear()
+
+def update_model_metrics(loaded, stats, manifest):
+    """Update model metrics in database when the artifacts are newer than the recorded ones"""
+    trained_at = datetime.fromisoformat(manifest['created_at'])
+    for model_type, model_stats in stats.items():
+        metric = ModelMetrics.query.filter_by(model_type=model_type).first()
+        if metric and metric.last_trained and metric.last_trained >= trained_at:
+            continue
+        if not metric:
+            metric = ModelMetrics(model_type=model_type)
+        
+        metric.accuracy = model_stats['accuracy']
+        metric.n_samples = model_stats['n_samples']
+        metric.last_trained = trained_at
+        if hasattr(loaded[model_type].model, 'feature_importances_'):
+            metric.feature_importance = loaded[model_type].model.feature_importances_.tolist()
+        fast = model_stats.get('fast') or {}
+        metric.fast_n_trees = fast.get('n_trees')
+        metric.fast_accuracy_delta = fast.get('accuracy_delta')
+        
+        db.session.add(metric)
+
+def load_models():
+    """Load persisted model artifacts, training and saving them if none exist"""
+    try:
+        with metrics.timer('model_load_seconds', source='startup'):
+            loaded, stats, manifest = load_artifacts()
+        print(f"Loaded model artifacts version {manifest['version']}")
+    except FileNotFoundError:
+        # No artifacts yet: train once and persist so later starts skip fitting
+        with metrics.timer('model_train_seconds', trigger='startup'):
+            build_artifacts()
+        with metrics.timer('model_load_seconds', source='startup'):
+            loaded, stats, manifest = load_artifacts()
+        print("Models trained successfully!")
+        print(f"Diabetes model accuracy: {stats['diabetes']['accuracy']:.2f}")
+        print(f"Cancer model accuracy: {stats['cancer']['accuracy']:.2f}")
+        print(f"Heart disease model accuracy: {stats['heart']['accuracy']:.2f}")
     
-    # Train models with sample data
-    training_stats = train_models(diabetes_model, cancer_model, heart_model)
+    install_models(loaded, stats, manifest)
     
-    # Update model metrics in database
-    model_dict = {
-        'diabetes': diabetes_model,
-        'cancer': cancer_model,
-        'heart': heart_model
+    with app.app_context():
+        update_model_metrics(loaded, stats, manifest)
+        db.session.commit()
+
+def reload_models():
+    """Load the newest artifacts in the background, then swap them in"""
+    try:
+        with metrics.timer('model_load_seconds', source='reload'):
+            loaded, stats, manifest = load_artifacts()
+        if artifact_version is None or manifest['version'] > artifact_version:
+            install_models(loaded, stats, manifest)
+            app.logger.info("Reloaded model artifacts version %s", manifest['version'])
+    except Exception:
+        app.logger.exception("Failed to reload model artifacts")
+    finally:
+        reload_in_progress.clear()
+
+@app.before_request
+def check_for_new_models():
+    # Another worker may have published a retrained version; keep serving the old one while loading.
+    # Nothing to replace until this process has loaded models: the first load picks up the newest
+    if artifact_version is None:
+        return
+    if artifact_watcher.poll(artifact_version) and not reload_in_progress.is_set():
+        reload_in_progress.set()
+        threading.Thread(target=reload_models, name='model-reload', daemon=True).start()
+
+def labelled_predictions(model_type, since, until):
+    """Features and outcomes of a model's predictions whose outcome was recorded in (since, until]"""
+    query = Prediction.query.filter(
+        Prediction.model_type == model_type,
+        Prediction.features_schema == MODEL_SPECS[model_type].schema_version,
+        Prediction.outcome.isnot(None),
+        Prediction.outcome_recorded_at <= until
+    )
+    if since is not None:
+        query = query.filter(Prediction.outcome_recorded_at > since)
+    rows = query.order_by(Prediction.id).all()
+    X = np.array([Prediction.unpack_features(row) for row in rows], dtype=float)
+    X = X.reshape(len(rows), MODEL_SPECS[model_type].n_features)
+    return X, np.array([row.outcome for row in rows], dtype=int)
+
+def last_increment(model_type):
+    """When the outcomes used by the model's latest incremental update end, or None"""
+    return db.session.execute(
+        db.select(db.func.max(TrainingHistory.data_until))
+        .where(TrainingHistory.model_type == model_type, TrainingHistory.kind == 'incremental')
+    ).scalar()
+
+def run_incremental_update(job):
+    """Update the current models on outcomes recorded since their last update; returns (loaded, stats, manifest)"""
+    until = datetime.utcnow()
+    labelled = {
+        model_type: labelled_predictions(model_type, last_increment(model_type), until)
+        for model_type in MODEL_SPECS
     }
+    with metrics.timer('model_train_seconds', trigger='incremental'):
+        _, _, manifest, increments = update_artifacts(labelled)
+    with metrics.timer('model_load_seconds', source='retrain'):
+        loaded, stats, manifest = load_artifacts()
+    install_models(loaded, stats, manifest)
     
+    for model_type, increment in increments.items():
+        # None for manifests written before fast variants
+        fast = stats[model_type]['fast'] or {}
+        db.session.add(TrainingHistory(
+            model_type=model_type,
+            accuracy=increment['accuracy'],
+            n_samples=increment['n_samples'],
+            trained_by=job.started_by,
+            fast_n_trees=fast.get('n_trees'),
+            fast_accuracy_delta=fast.get('accuracy_delta'),
+            kind='incremental',
+            trees_replaced=increment['trees_replaced'],
+            data_until=until
+        ))
+    # The job reports each model's increment, or None for models left as they were
+    stats = {model_type: dict(model_stats, increment=increments.get(model_type))
+             for model_type, model_stats in stats.items()}
+    return loaded, stats, manifest
+
+def run_full_retrain(job):
+    """Train fresh model instances and publish them as artifacts; returns (loaded, stats, manifest)"""
+    # Fresh instances: the live models keep serving until the swap
+    with metrics.timer('model_train_seconds', trigger='retrain'):
+        build_artifacts()
+    with metrics.timer('model_load_seconds', source='retrain'):
+        loaded, stats, manifest = load_artifacts()
+    install_models(loaded, stats, manifest)
+    
+    # Record training history
+    for model_type, model_stats in stats.items():
+        db.session.add(TrainingHistory(
+            model_type=model_type,
+            accuracy=model_stats['accuracy'],
+            n_samples=model_stats['n_samples'],
+            trained_by=job.started_by,
+            fast_n_trees=model_stats['fast']['n_trees'],
+            fast_accuracy_delta=model_stats['fast']['accuracy_delta'],
+            kind='full'
+        ))
+    return loaded, stats, manifest
+
+def run_retrain_job(job_id):
+    """Train or update the models, publish them as artifacts and swap them in"""
     with app.app_context():
-        for model_type, stats in training_stats.items():
-            metric = ModelMetrics.query.filter_by(model_type=model_type).first()
-            if not metric:
-                metric = ModelMetrics(model_type=model_type)
-            
-            metric.accuracy = stats['accuracy']
-            metric.n_samples = stats['n_samples']
-            if hasattr(model_dict[model_type].model, 'feature_importances_'):
-                metric.feature_importance = model_dict[model_type].model.feature_importances_.tolist()
+        job = db.session.get(RetrainJob, job_id)
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        
+        try:
+            if job.mode == 'incremental':
+                loaded, stats, manifest = run_incremental_update(job)
+            else:
+                loaded, stats, manifest = run_full_retrain(job)
+            update_model_metrics(loaded, stats, manifest)
             
-            db.session.add(metric)
+            job.status = 'succeeded'
+            job.artifact_version = manifest['version']
+            job.stats = stats
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception("Retrain job %s failed", job_id)
+            job = db.session.get(RetrainJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)
         
+        job.active = None  # lets the next retrain start
+        job.finished_at = datetime.utcnow()
         db.session.commit()
-    
-    print("Models trained successfully!")
-    print(f"Diabetes model accuracy: {training_stats['diabetes']['accuracy']:.2f}")
-    print(f"Cancer model accuracy: {training_stats['cancer']['accuracy']:.2f}")
-    print(f"Heart disease model accuracy: {training_stats['heart']['accuracy']:.2f}")
+
+def retrain_job_payload(job):
+    """Serialize a retrain job for the API"""
+    return {
+        'id': job.id,
+        'status': job.status,
+        'mode': job.mode or 'full',
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'artifact_version': job.artifact_version,
+        'stats': job.stats,
+        'error': job.error
+    }
+
+# Models are loaded by the first request that needs them, or once in the gunicorn
+# master before it forks its workers (see gunicorn.conf.py)
+
+def get_model(model_type):
+    """Return the loaded model and its expected feature count"""
+    loaded = model_registry.get(model_type)
+    return loaded.model, loaded.spec.n_features
+
+def metric_model_label(model_type):
+    """Model type as a metric label; unknown names from the URL share one series"""
+    return model_type if model_type in MODEL_SPECS else 'unknown'
+
+def record_request(endpoint, model_type, started, error=None):
+    """Count a prediction request and its total latency, plus its error type if it failed"""
+    label = metric_model_label(model_type)
+    metrics.inc('prediction_requests_total', endpoint=endpoint, model_type=label,
+                status='error' if error else 'success')
+    metrics.observe('prediction_request_seconds', time.perf_counter() - started,
+                    endpoint=endpoint, model_type=label)
+    if error is not None:
+        metrics.inc('prediction_errors_total', endpoint=endpoint, model_type=label,
+                    exception=type(error).__name__)
+
+def _batch_scorer(model_type):
+    """Score a matrix with whichever model is currently loaded for model_type"""
+    return lambda rows: get_model(model_type)[0].predict_batch(rows)
+
+micro_batchers = {
+    model_type: MicroBatcher(
+        _batch_scorer(model_type),
+        max_batch_size=app.config['MICRO_BATCH_MAX_SIZE'],
+        max_wait_ms=app.config['MICRO_BATCH_MAX_WAIT_MS']
+    )
+    for model_type in MODEL_SPECS
+} if app.config['MICRO_BATCH_ENABLED'] else {}
 
 @app.route('/')
 def home():
+    model_registry.ensure_loaded()
     return render_template('index.html', training_stats=training_stats)
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -135,83 +416,210 @@ def logout():
     logout_user()
     return redirect(url_for('home'))
 
-@app.route('/predict/<model_type>', methods=['POST'])
-@login_required
-def predict(model_type):
+def early_exit_delta():
+    """The delta predict_anytime takes for the configured EARLY_EXIT mode"""
+    mode = app.config['EARLY_EXIT']
+    if mode not in ('exact', 'hoeffding'):
+        raise ValueError(f"Invalid EARLY_EXIT mode: {mode}")
+    return app.config['EARLY_EXIT_DELTA'] if mode == 'hoeffding' else None
+
+def explain_requested(value):
+    """Whether the explain query parameter asks for per-prediction explanations"""
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+def explain_deadline():
+    """Time by which an explanation stops adding trees and returns what it has"""
+    return time.perf_counter() + app.config['EXPLAIN_BUDGET_MS'] / 1000.0
+
+def score_single(user_id, model_type, body, explain=False, variant=None):
+    """Parse, validate, score and record one prediction request body; returns (payload, status)"""
+    started = time.perf_counter()
+    timed = partial(metrics.timer, 'prediction_stage_seconds',
+                    endpoint='single', model_type=metric_model_label(model_type))
     try:
-        data = request.get_json()
+        with timed(stage='parse'):
+            features = body_features(body)
         
-        if model_type == 'diabetes':
-            features = validate_input_features(data['features'], 8, model_type)
-            probability = diabetes_model.predict(features)
-            model = diabetes_model
-        elif model_type == 'cancer':
-            features = validate_input_features(data['features'], 30, model_type)
-            probability = cancer_model.predict(features)
-            model = cancer_model
-        elif model_type == 'heart':
-            features = validate_input_features(data['features'], 11, model_type)
-            probability = heart_model.predict(features)
-            model = heart_model
-        else:
-            raise ValueError(f"Invalid model type: {model_type}")
+        with timed(stage='validate'):
+            loaded = model_registry.get(model_type)
+            variant, model = loaded.variant(variant or app.config['MODEL_VARIANT'])
+            features = validate_input_features(
+                features, loaded.spec.n_features, model_type, bounds=loaded.spec.bounds
+            )
+        
+        # Identical inputs to the same model version skip the forest entirely
+        cache_key = prediction_cache.make_key(model_type, f'{model.version}/{variant}', features)
+        probability = prediction_cache.get(cache_key)
+        trees_used = 0
+        if probability is None:
+            with timed(stage='predict'):
+                if app.config['EARLY_EXIT'] != 'off':
+                    probabilities, trees = model.predict_anytime(features[None, :], delta=early_exit_delta())
+                    probability, trees_used = float(probabilities[0]), int(trees[0])
+                elif model_type in micro_batchers and variant == 'full':
+                    probability = micro_batchers[model_type].predict(features)
+                else:
+                    probability = model.predict(features)
+            prediction_cache.set(cache_key, probability)
         
         result = format_prediction_result(probability)
+        result['variant'] = variant
+        if app.config['EARLY_EXIT'] != 'off':
+            result['trees_used'] = trees_used  # 0 when served from the cache
+            metrics.inc('prediction_trees_evaluated_total', trees_used, model_type=model_type)
         
         # Save prediction to database
-        prediction = Prediction(
-            user_id=current_user.id,
-            model_type=model_type,
-            features=data['features'],
-            prediction=result['prediction'],
-            probability=probability
-        )
-        db.session.add(prediction)
-        db.session.commit()
+        with timed(stage='db_write'):
+            prediction_writer.submit([{
+                'user_id': user_id,
+                'model_type': model_type,
+                'features': features.tolist(),
+                'features_schema': loaded.spec.schema_version,
+                'variant': variant,
+                'prediction': result['prediction'],
+                'probability': probability
+            }])
         
-        # Add feature importance if available
-        if hasattr(model.model, 'feature_importances_'):
-            if model_type == 'diabetes':
-                feature_names = [
-                    'Glucose', 'Blood Pressure', 'BMI', 'Age',
-                    'Insulin', 'Skin Thickness', 'Pregnancies', 'Diabetes Pedigree'
-                ]
-            elif model_type == 'cancer':
-                feature_names = ['Mean Radius', 'Mean Texture', 'Mean Perimeter', 'Mean Area'] + \
-                              [f'Feature_{i}' for i in range(26)]
-            else:  # heart
-                feature_names = [
-                    'Age', 'Resting BP', 'Cholesterol', 'Max Heart Rate', 'ST Depression',
-                    'Chest Pain', 'Rest ECG', 'Angina', 'ST Slope', 'Vessels', 'Thal'
-                ]
-            result['feature_importance'] = dict(zip(feature_names, model.model.feature_importances_))
+        # Add feature importance if available (computed once when the model was installed)
+        with timed(stage='importance'):
+            if loaded.feature_importance is not None:
+                result['feature_importance'] = loaded.feature_importance
         
-        return jsonify({
+        # Why this patient scored as they did; only complete explanations are cached
+        if explain:
+            with timed(stage='explain'):
+                explanation = explanation_cache.get(cache_key)
+                if explanation is None:
+                    explanation = loaded.explain(features[None, :], deadline=explain_deadline(), variant=variant)[0]
+                    if explanation['complete']:
+                        explanation_cache.set(cache_key, explanation)
+                result['explanation'] = explanation
+        
+        record_request('single', model_type, started)
+        return {
             'success': True,
             **result
-        })
+        }, 200
     except Exception as e:
-        return jsonify({
+        record_request('single', model_type, started, error=e)
+        return {
             'success': False,
             'error': str(e)
-        }), 400
+        }, 400
 
-@app.route('/model-info')
-def model_info():
+@app.route('/predict/<model_type>', methods=['POST'])
+@login_required
+def predict(model_type):
+    payload, status = score_single(current_user.id, model_type, request.get_data(cache=False),
+                                   explain=explain_requested(request.args.get('explain')),
+                                   variant=request.args.get('variant'))
+    return json_response(payload, status=status)
+
+def score_batch(user_id, model_type, body, explain=False, variant=None):
+    """Parse, validate, score and record a batch prediction request body; returns (payload, status)"""
+    started = time.perf_counter()
+    timed = partial(metrics.timer, 'prediction_stage_seconds',
+                    endpoint='batch', model_type=metric_model_label(model_type))
+    try:
+        with timed(stage='parse'):
+            features = body_features(body)
+        
+        with timed(stage='validate'):
+            loaded = model_registry.get(model_type)
+            variant, model = loaded.variant(variant or app.config['MODEL_VARIANT'])
+            features = validate_batch_features(
+                features, loaded.spec.n_features, model_type, app.config['MAX_BATCH_SIZE'],
+                bounds=loaded.spec.bounds
+            )
+        
+        # Score every row with one scaler transform and one predict_proba call
+        with timed(stage='predict'):
+            if app.config['EARLY_EXIT'] != 'off':
+                probabilities, trees_used = model.predict_anytime(features, delta=early_exit_delta())
+            else:
+                probabilities = model.predict_batch(features)
+        results = format_batch_results(probabilities)
+        if app.config['EARLY_EXIT'] != 'off':
+            for result, trees in zip(results, trees_used.tolist()):
+                result['trees_used'] = trees
+            metrics.inc('prediction_trees_evaluated_total', int(trees_used.sum()), model_type=model_type)
+        
+        # Save all predictions with a single bulk insert
+        with timed(stage='db_write'):
+            prediction_writer.submit([
+                {
+                    'user_id': user_id,
+                    'model_type': model_type,
+                    'features': row,
+                    'features_schema': loaded.spec.schema_version,
+                    'variant': variant,
+                    'prediction': result['prediction'],
+                    'probability': result['probability']
+                }
+                for row, result in zip(features.tolist(), results)
+            ])
+        
+        # All rows are explained together, sharing one latency budget
+        if explain:
+            with timed(stage='explain'):
+                explanations = loaded.explain(features, deadline=explain_deadline(), variant=variant)
+                for result, explanation in zip(results, explanations):
+                    result['explanation'] = explanation
+        
+        record_request('batch', model_type, started)
+        metrics.inc('prediction_rows_total', len(results), endpoint='batch', model_type=model_type)
+        return {
+            'success': True,
+            'count': len(results),
+            'variant': variant,
+            'results': results
+        }, 200
+    except Exception as e:
+        record_request('batch', model_type, started, error=e)
+        return {
+            'success': False,
+            'error': str(e)
+        }, 400
+
+@app.route('/predict/<model_type>/batch', methods=['POST'])
+@login_required
+def predict_batch(model_type):
+    payload, status = score_batch(current_user.id, model_type, request.get_data(cache=False),
+                                  explain=explain_requested(request.args.get('explain')),
+                                  variant=request.args.get('variant'))
+    return json_response(payload, status=status)
+
+def model_info_payload():
+    """Training metrics of every model, plus prediction cache statistics"""
     metrics = {
         metric.model_type: {
             'accuracy': metric.accuracy,
             'n_samples': metric.n_samples,
             'last_trained': metric.last_trained.isoformat(),
-            'feature_importance': metric.feature_importance
+            'feature_importance': metric.feature_importance,
+            'fast_variant': {
+                'n_trees': metric.fast_n_trees,
+                'accuracy_delta': metric.fast_accuracy_delta
+            }
         }
         for metric in ModelMetrics.query.all()
     }
     
-    return jsonify({
+    return {
         'status': 'healthy',
-        'models': metrics
-    })
+        'models': metrics,
+        'cache': prediction_cache.stats(),
+        'database': pool_stats()
+    }
+
+@app.route('/model-info')
+def model_info():
+    return jsonify(model_info_payload())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # Prometheus text format, summed over every worker sharing METRICS_DIR
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 @app.route('/retrain', methods=['POST'])
 @login_required
@@ -222,47 +630,295 @@ def retrain_models():
             'error': 'Only administrators can retrain models'
         }), 403
     
+    # 'incremental' updates the current models from recorded outcomes instead of refitting them
+    mode = (request.get_json(silent=True) or {}).get('mode', 'full')
+    if mode not in ('full', 'incremental'):
+        return jsonify({
+            'success': False,
+            'error': f'Invalid retrain mode: {mode}'
+        }), 400
+    
+    # Only one retrain at a time across all workers; ignore jobs abandoned by a dead worker
+    cutoff = datetime.utcnow() - timedelta(seconds=app.config['RETRAIN_JOB_TIMEOUT'])
+    job = claim_retrain_job(current_user.id, mode, cutoff)
+    if job is None:
+        active = RetrainJob.query.filter(RetrainJob.active.is_(True)).first()
+        return jsonify({
+            'success': False,
+            'error': 'A retrain job is already in progress',
+            'job': retrain_job_payload(active) if active else None
+        }), 409
+    
+    threading.Thread(target=run_retrain_job, args=(job.id,), name='retrain', daemon=True).start()
+    
+    return jsonify({
+        'success': True,
+        'message': 'Retraining started',
+        'job': retrain_job_payload(job),
+        'status_url': url_for('retrain_status', job_id=job.id)
+    }), 202
+
+@app.route('/retrain/<int:job_id>')
+@login_required
+def retrain_status(job_id):
+    if not current_user.is_admin:
+        return jsonify({
+            'success': False,
+            'error': 'Only administrators can view retrain jobs'
+        }), 403
+    
+    job = db.session.get(RetrainJob, job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': f'Retrain job {job_id} not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': retrain_job_payload(job)
+    })
+
+@app.route('/user/predictions')
+@login_required
+def user_predictions():
+    # Rows are loaded page by page from /api/predictions by the template
+    return render_template('predictions.html', page_size=app.config['HISTORY_PAGE_SIZE'])
+
+def history_columns(fields):
+    """Map history API fields to the Prediction columns that hold them"""
+    columns = []
+    for field in fields:
+        if field == 'features':
+            columns += [Prediction.features_json, Prediction.features_blob, Prediction.features_codec]
+        else:
+            columns.append(getattr(Prediction, field))
+    return columns
+
+def prediction_payload(row, fields):
+    """Serialize the projected columns of a prediction row"""
+    payload = {field: getattr(row, field) for field in fields if field != 'features'}
+    if 'features' in fields:
+        payload['features'] = Prediction.unpack_features(row)
+    payload['created_at'] = row.created_at.isoformat()
+    return payload
+
+def history_page(user_id, args):
+    """One keyset-paginated page of a user's prediction history; returns (payload, status)"""
     try:
-        global training_stats
-        training_stats = train_models(diabetes_model, cancer_model, heart_model)
+        limit = min(
+            int(args.get('limit', app.config['HISTORY_PAGE_SIZE'])),
+            app.config['HISTORY_MAX_PAGE_SIZE']
+        )
+        if limit < 1:
+            raise ValueError("limit must be positive")
         
-        # Record training history
-        for model_type, stats in training_stats.items():
-            history = TrainingHistory(
-                model_type=model_type,
-                accuracy=stats['accuracy'],
-                n_samples=stats['n_samples'],
-                trained_by=current_user.id
-            )
-            db.session.add(history)
-            
-            # Update model metrics
-            metric = ModelMetrics.query.filter_by(model_type=model_type).first()
-            if metric:
-                metric.accuracy = stats['accuracy']
-                metric.n_samples = stats['n_samples']
-                metric.last_trained = history.trained_at
-                if hasattr(locals()[f"{model_type}_model"].model, 'feature_importances_'):
-                    metric.feature_importance = locals()[f"{model_type}_model"].model.feature_importances_.tolist()
+        fields = args.get('fields')
+        fields = fields.split(',') if fields else list(HISTORY_DEFAULT_FIELDS)
+        unknown = [field for field in fields if field not in HISTORY_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        # The cursor is built from id and created_at, so always select them
+        fields = ['id', 'created_at'] + [field for field in fields if field not in ('id', 'created_at')]
         
-        db.session.commit()
+        query = db.select(*history_columns(fields)).where(
+            Prediction.user_id == user_id
+        )
+        cursor = args.get('cursor')
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            query = query.where(db.or_(
+                Prediction.created_at < created_at,
+                db.and_(Prediction.created_at == created_at, Prediction.id < row_id)
+            ))
+        query = query.order_by(Prediction.created_at.desc(), Prediction.id.desc()).limit(limit + 1)
         
-        return jsonify({
+        rows = db.session.execute(query).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        return {
             'success': True,
-            'message': 'Models retrained successfully',
-            'stats': training_stats
-        })
-    except Exception as e:
-        return jsonify({
+            'predictions': [prediction_payload(row, fields) for row in rows],
+            'next_cursor': encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+        }, 200
+    except ValueError as e:
+        return {
             'success': False,
             'error': str(e)
-        }), 400
+        }, 400
 
-@app.route('/user/predictions')
+@app.route('/api/predictions')
 @login_required
-def user_predictions():
-    predictions = Prediction.query.filter_by(user_id=current_user.id).order_by(Prediction.created_at.desc()).all()
-    return render_template('predictions.html', predictions=predictions)
+def prediction_history():
+    payload, status = history_page(current_user.id, request.args)
+    return jsonify(payload), status
+
+def prediction_detail_payload(user_id, prediction_id):
+    """A single prediction of a user, with its features; returns (payload, status)"""
+    prediction = Prediction.query.filter_by(id=prediction_id, user_id=user_id).first()
+    if prediction is None:
+        return {
+            'success': False,
+            'error': f'Prediction {prediction_id} not found'
+        }, 404
+    
+    return {
+        'success': True,
+        'prediction': prediction_payload(prediction, HISTORY_FIELDS)
+    }, 200
+
+@app.route('/api/predictions/<int:prediction_id>')
+@login_required
+def prediction_detail(prediction_id):
+    payload, status = prediction_detail_payload(current_user.id, prediction_id)
+    return jsonify(payload), status
+
+def record_outcome_payload(user_id, prediction_id, body):
+    """Record the confirmed diagnosis of one of a user's predictions; returns (payload, status)"""
+    prediction = Prediction.query.filter_by(id=prediction_id, user_id=user_id).first()
+    if prediction is None:
+        return {
+            'success': False,
+            'error': f'Prediction {prediction_id} not found'
+        }, 404
+    
+    outcome = (body or {}).get('outcome')
+    if outcome not in (0, 1, True, False):
+        return {
+            'success': False,
+            'error': 'outcome must be 0 or 1'
+        }, 400
+    
+    # Recording it again moves it into the next incremental update
+    prediction.outcome = int(outcome)
+    prediction.outcome_recorded_at = datetime.utcnow()
+    db.session.commit()
+    return {
+        'success': True,
+        'prediction': prediction_payload(prediction, HISTORY_FIELDS)
+    }, 200
+
+@app.route('/api/predictions/<int:prediction_id>/outcome', methods=['POST'])
+@login_required
+def record_outcome(prediction_id):
+    payload, status = record_outcome_payload(current_user.id, prediction_id, request.get_json(silent=True))
+    return jsonify(payload), status
+
+@app.route('/analytics')
+@login_required
+def analytics():
+    if not current_user.is_admin:
+        return jsonify({
+            'success': False,
+            'error': 'Only administrators can view fleet analytics'
+        }), 403
+    
+    try:
+        query = db.select(PredictionRollup)
+        model_type = request.args.get('model_type')
+        if model_type:
+            query = query.where(PredictionRollup.model_type == model_type)
+        start = request.args.get('from')
+        if start:
+            query = query.where(PredictionRollup.day >= datetime.strptime(start, '%Y-%m-%d').date())
+        end = request.args.get('to')
+        if end:
+            query = query.where(PredictionRollup.day <= datetime.strptime(end, '%Y-%m-%d').date())
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Dates must be given as YYYY-MM-DD'
+        }), 400
+    
+    # Reads only the rollup table: one row per model and day, however many predictions there are
+    rollups = db.session.execute(
+        query.order_by(PredictionRollup.model_type, PredictionRollup.day)
+    ).scalars().all()
+    
+    days = {}
+    totals = {}
+    for rollup in rollups:
+        days.setdefault(rollup.model_type, []).append({
+            'day': rollup.day.isoformat(),
+            'count': rollup.count,
+            'positive_rate': rollup.positives / rollup.count if rollup.count else 0.0,
+            'mean_probability': rollup.probability_sum / rollup.count if rollup.count else 0.0
+        })
+        total = totals.setdefault(rollup.model_type, [0, 0, 0.0])
+        total[0] += rollup.count
+        total[1] += rollup.positives
+        total[2] += rollup.probability_sum
+    
+    return jsonify({
+        'success': True,
+        'models': {
+            model_type: {
+                'count': count,
+                'positive_rate': positives / count if count else 0.0,
+                'mean_probability': probability_sum / count if count else 0.0,
+                'days': days[model_type]
+            }
+            for model_type, (count, positives, probability_sum) in totals.items()
+        }
+    })
+
+@app.cli.command('backfill-rollups')
+@click.option('--batch-size', default=5000, help='Prediction rows read per query')
+def backfill_rollups_command(batch_size):
+    """Rebuild the daily analytics rollups from existing predictions"""
+    n_rollups = backfill_rollups(batch_size=batch_size)
+    print(f"Rebuilt {n_rollups} daily rollup rows")
+
+@app.cli.command('migrate-features')
+@click.option('--batch-size', default=1000, help='Rows re-encoded per transaction')
+@click.option('--vacuum', is_flag=True, help='Compact the SQLite file afterwards')
+def migrate_features_command(batch_size, vacuum):
+    """Re-encode JSON prediction features as packed binary blobs"""
+    migrated = migrate_prediction_features(batch_size=batch_size, vacuum=vacuum)
+    print(f"Migrated {migrated} prediction rows to packed, versioned features")
+
+@app.cli.command('score-file')
+@click.argument('model_type', type=click.Choice(list(MODEL_SPECS)))
+@click.argument('input_path')
+@click.argument('output_path')
+@click.option('--chunk-size', default=50000, help='Rows read and scored per chunk')
+@click.option('--workers', type=int, default=None, help='Scoring processes (default: one per core, 0: none)')
+@click.option('--id-column', 'id_columns', multiple=True, help='Input column copied to the output (repeatable)')
+@click.option('--variant', type=click.Choice(['full', 'fast']), default='full')
+@click.option('--load-predictions', is_flag=True, help='Also insert the scored rows into the prediction table')
+@click.option('--username', default='admin', help='User the loaded predictions are recorded for')
+def score_file_command(model_type, input_path, output_path, chunk_size, workers, id_columns, variant,
+                       load_predictions, username):
+    """Score a CSV or Parquet file offline with the saved models"""
+    on_chunk = None
+    if load_predictions:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"No user named {username}")
+        
+        def on_chunk(X, probabilities):
+            # One bulk insert and commit per chunk; rows with missing features were not scored
+            scored = ~np.isnan(probabilities)
+            save_predictions([
+                {
+                    'user_id': user.id,
+                    'model_type': model_type,
+                    'features': row,
+                    'features_schema': MODEL_SPECS[model_type].schema_version,
+                    'variant': variant,
+                    'prediction': probability >= 0.5,
+                    'probability': probability
+                }
+                for row, probability in zip(X[scored].tolist(), probabilities[scored].tolist())
+            ])
+    
+    try:
+        summary = score_file(model_type, input_path, output_path, chunk_size=chunk_size, workers=workers,
+                             id_columns=id_columns, variant=variant, on_chunk=on_chunk)
+    except (ValueError, FileNotFoundError, ImportError) as e:
+        raise click.ClickException(str(e))
+    print_summary(summary)
 
 if __name__ == '__main__':
     # Create all database tables
@@ -281,8 +937,5 @@ if __name__ == '__main__':
             db.session.add(admin)
             db.session.commit()
         
-        # Load models within app context
-        load_models()
-    
     # Run the application
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,130 @@
+# Async serving mode (SERVER_MODE=asgi in start.sh): /predict, /model-info and the
+# prediction history API are served on an event loop, with their blocking work
+# (parsing, scoring, database access) on a bounded thread pool, so one process can
+# hold hundreds of concurrent connections. Every other route goes to the Flask app.
+import asyncio
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Commit predictions from the write-behind thread, never on a request thread
+os.environ.setdefault('PREDICTION_WRITE_MODE', 'async')
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+import app as flask_module
+from app import app as flask_app
+from models.database import db, User
+from utils.fast_json import dumps
+
+# Threads doing blocking work for requests, and how many requests may queue for them
+ASYNC_WORKER_THREADS = int(os.getenv('ASYNC_WORKER_THREADS', '8'))
+ASYNC_MAX_PENDING = int(os.getenv('ASYNC_MAX_PENDING', '512'))
+
+executor = ThreadPoolExecutor(max_workers=ASYNC_WORKER_THREADS, thread_name_prefix='asgi-worker')
+_pending = None
+_session_serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status_code=status, media_type='application/json')
+
+def session_user_id(request):
+    """Read the user id Flask-Login stored in the signed Flask session cookie"""
+    cookie = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if not cookie:
+        return None
+    try:
+        session = _session_serializer.loads(
+            cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds())
+        )
+    except BadSignature:
+        return None
+    return session.get('_user_id')
+
+def _in_app_context(fn, user_id, *args):
+    """Run fn for a logged-in user inside a Flask application context"""
+    with flask_app.app_context():
+        try:
+            user = db.session.get(User, int(user_id)) if user_id is not None else None
+            if user is None:
+                return {'success': False, 'error': 'Authentication required'}, 401
+            return fn(user.id, *args)
+        finally:
+            db.session.remove()
+
+async def run_blocking(fn, user_id, *args):
+    """Run blocking request work on the bounded executor, queueing when it is busy"""
+    global _pending
+    if _pending is None:
+        _pending = asyncio.Semaphore(ASYNC_MAX_PENDING)
+    if _pending.locked():
+        return {'success': False, 'error': 'Server is busy, try again shortly'}, 503
+    async with _pending:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, _in_app_context, fn, user_id, *args)
+
+async def predict(request):
+    body = await request.body()
+    payload, status = await run_blocking(
+        flask_module.score_single, session_user_id(request), request.path_params['model_type'], body,
+        flask_module.explain_requested(request.query_params.get('explain')), request.query_params.get('variant')
+    )
+    return json_response(payload, status)
+
+async def predict_batch(request):
+    body = await request.body()
+    payload, status = await run_blocking(
+        flask_module.score_batch, session_user_id(request), request.path_params['model_type'], body,
+        flask_module.explain_requested(request.query_params.get('explain')), request.query_params.get('variant')
+    )
+    return json_response(payload, status)
+
+async def model_info(request):
+    loop = asyncio.get_running_loop()
+
+    def payload():
+        with flask_app.app_context():
+            try:
+                return flask_module.model_info_payload()
+            finally:
+                db.session.remove()
+
+    return json_response(await loop.run_in_executor(executor, payload))
+
+async def prediction_history(request):
+    payload, status = await run_blocking(
+        flask_module.history_page, session_user_id(request), dict(request.query_params)
+    )
+    return json_response(payload, status)
+
+async def prediction_detail(request):
+    payload, status = await run_blocking(
+        flask_module.prediction_detail_payload, session_user_id(request), request.path_params['prediction_id']
+    )
+    return json_response(payload, status)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Load the models before accepting requests rather than on the first one
+    await asyncio.get_running_loop().run_in_executor(executor, flask_module.model_registry.ensure_loaded)
+    yield
+
+class _ModelReloadRoute(Route):
+    """A Route that first lets the worker notice artifacts published by a retrain elsewhere"""
+
+    async def handle(self, scope, receive, send):
+        flask_module.check_for_new_models()
+        await super().handle(scope, receive, send)
+
+application = Starlette(routes=[
+    _ModelReloadRoute('/predict/{model_type}', predict, methods=['POST']),
+    _ModelReloadRoute('/predict/{model_type}/batch', predict_batch, methods=['POST']),
+    _ModelReloadRoute('/model-info', model_info, methods=['GET']),
+    Route('/api/predictions', prediction_history, methods=['GET']),
+    Route('/api/predictions/{prediction_id:int}', prediction_detail, methods=['GET']),
+    Mount('/', app=WSGIMiddleware(flask_app, workers=ASYNC_WORKER_THREADS))
+], lifespan=lifespan)
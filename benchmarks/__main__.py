@@ -0,0 +1,47 @@
+import argparse
+import importlib
+import json
+import sys
+
+from benchmarks.harness import environment, write_results, compare
+
+SUITES = ('inference', 'anytime', 'training', 'http')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Run the performance benchmarks')
+    parser.add_argument('suites', nargs='*', help=f"Suites to run: {', '.join(SUITES)} (default: all)")
+    parser.add_argument('--quick', action='store_true', help='Fewer repetitions and smaller datasets')
+    parser.add_argument('--output', default='benchmarks/results.json', help='Where to write the results JSON')
+    parser.add_argument('--baseline', help='Results JSON of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed median slowdown before a benchmark counts as a regression')
+    args = parser.parse_args(argv)
+    unknown = [suite for suite in args.suites if suite not in SUITES]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    results = {'environment': environment(), 'quick': args.quick, 'benchmarks': {}}
+    # The HTTP suite imports the app, which reads its configuration on import, so it runs last
+    for suite in sorted(args.suites or SUITES, key=SUITES.index):
+        print(f"Running {suite} benchmarks...", file=sys.stderr)
+        module = importlib.import_module(f'benchmarks.bench_{suite}')
+        results['benchmarks'].update(module.run(quick=args.quick))
+
+    write_results(results, args.output)
+    for name, summary in sorted(results['benchmarks'].items()):
+        print(f"{name:50s} p50 {summary['p50_ms']:10.3f} ms  p99 {summary['p99_ms']:10.3f} ms")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, tolerance=args.tolerance)
+        for name, previous, current, ratio, regressed in rows:
+            flag = '  REGRESSION' if regressed else ''
+            print(f"{name:50s} {previous:10.3f} -> {current:10.3f} ms  x{ratio:.2f}{flag}")
+        if any(regressed for *_, regressed in rows):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import numpy as np
+
+from benchmarks.harness import measure, summarize
+from models.registry import MODEL_SPECS
+
+# Early-exit modes: None stops only when the class is certain, floats are Hoeffding deltas
+MODES = {'exact': None, 'hoeffding_0.05': 0.05, 'hoeffding_0.01': 0.01}
+
+def run(quick=False):
+    """Early-exit inference on each test split: latency, trees evaluated per row, and parity with the full forest"""
+    repeat = 5 if quick else 30
+    results = {}
+    for model_type, spec in MODEL_SPECS.items():
+        X_train, X_test, y_train, y_test = spec.generate_data()
+        model = spec.model_class()
+        model.train(X_train, y_train)
+        model.compile_engine()
+
+        full = model.predict_batch(X_test) >= 0.5
+        results[f'anytime.{model_type}.full'] = dict(
+            summarize(measure(lambda: model.predict_batch(X_test), repeat=repeat), rows=len(X_test)),
+            trees_mean=float(model.engine.n_estimators),
+            accuracy=float(np.mean(full == y_test))
+        )
+
+        for mode, delta in MODES.items():
+            probabilities, trees_used = model.predict_anytime(X_test, delta=delta)
+            predicted = probabilities >= 0.5
+            tree_counts, rows = np.unique(trees_used, return_counts=True)
+            results[f'anytime.{model_type}.{mode}'] = dict(
+                summarize(measure(lambda: model.predict_anytime(X_test, delta=delta), repeat=repeat),
+                          rows=len(X_test)),
+                trees_mean=float(trees_used.mean()),
+                trees_p50=float(np.percentile(trees_used, 50)),
+                trees_p90=float(np.percentile(trees_used, 90)),
+                trees_histogram={str(trees): int(count) for trees, count in zip(tree_counts, rows)},
+                parity=float(np.mean(predicted == full)),
+                accuracy=float(np.mean(predicted == y_test))
+            )
+    return results
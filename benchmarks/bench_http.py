@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.harness import measure, summarize
+from models.registry import MODEL_SPECS
+
+def run(quick=False):
+    """End-to-end POST /predict/<model_type> through the Flask test client, committing to SQLite"""
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+
+    # Measure the plain synchronous path: every request parses, scores and commits its row
+    os.environ['DATABASE_URL'] = f'sqlite:///{database.name}'
+    os.environ['PREDICTION_WRITE_MODE'] = 'sync'
+    os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    os.environ['MICRO_BATCH_ENABLED'] = 'false'
+    os.environ.pop('METRICS_DIR', None)
+
+    from app import app
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+    repeat = 50 if quick else 300
+    results = {}
+    try:
+        for model_type, spec in MODEL_SPECS.items():
+            X_test = spec.generate_data()[1]
+            rng = np.random.default_rng(0)
+            # The sample generators can produce values outside the API's clinical bounds
+            rows = np.clip(X_test[rng.integers(0, len(X_test), size=repeat + 10)], *spec.bounds).tolist()
+            position = iter(range(10 ** 9))
+
+            def post():
+                response = client.post(f'/predict/{model_type}', json={'features': rows[next(position) % len(rows)]})
+                if response.status_code != 200:
+                    raise RuntimeError(f"/predict/{model_type} returned {response.status_code}: {response.get_json()}")
+
+            results[f'http.predict.{model_type}'] = summarize(measure(post, repeat=repeat))
+    finally:
+        os.unlink(database.name)
+    return results
@@ -0,0 +1,49 @@
+import numpy as np
+
+from benchmarks.harness import measure, summarize
+from models.registry import MODEL_SPECS, LoadedModel
+
+BATCH_SIZES = (1, 16, 256, 4096)
+
+def run(quick=False):
+    """Single-row and batched inference for every model class, on both engines, and explanations"""
+    repeat = 50 if quick else 300
+    results = {}
+    for model_type, spec in MODEL_SPECS.items():
+        X_train, X_test, y_train, y_test = spec.generate_data()
+        model = spec.model_class()
+        model.train(X_train, y_train)
+
+        # Score held-out rows, cycling through them so every call sees a different input
+        rng = np.random.default_rng(0)
+        rows = X_test[rng.integers(0, len(X_test), size=max(BATCH_SIZES))]
+
+        for engine in ('sklearn', 'compiled'):
+            model.engine = None
+            if engine == 'compiled':
+                model.compile_engine()
+
+            position = iter(range(10 ** 9))
+            results[f'inference.{model_type}.{engine}.single'] = summarize(
+                measure(lambda: model.predict(rows[next(position) % len(rows)].tolist()), repeat=repeat)
+            )
+            for batch_size in BATCH_SIZES:
+                batch = rows[:batch_size]
+                results[f'inference.{model_type}.{engine}.batch_{batch_size}'] = summarize(
+                    measure(lambda: model.predict_batch(batch), repeat=max(5, repeat // 10)),
+                    rows=batch_size
+                )
+
+        # Per-prediction explanations over every tree, with no latency budget
+        loaded = LoadedModel(spec, model)
+        position = iter(range(10 ** 9))
+        results[f'inference.{model_type}.explain.single'] = summarize(
+            measure(lambda: loaded.explain(rows[next(position) % len(rows)][None, :]), repeat=repeat)
+        )
+        for batch_size in (16, 256):
+            batch = rows[:batch_size]
+            results[f'inference.{model_type}.explain.batch_{batch_size}'] = summarize(
+                measure(lambda: loaded.explain(batch), repeat=max(5, repeat // 10)),
+                rows=batch_size
+            )
+    return results
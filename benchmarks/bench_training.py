@@ -0,0 +1,19 @@
+from benchmarks.harness import measure, summarize
+from models.registry import MODEL_SPECS
+from models.parallel_training import fit_model, default_cpu_budget
+
+SAMPLE_SIZES = (1000, 10000, 50000)
+
+def run(quick=False):
+    """fit_model over every registered model at increasing sample-data sizes, as build_artifacts trains them"""
+    results = {}
+    cpu_budget = default_cpu_budget()
+    for n_samples in SAMPLE_SIZES[:2] if quick else SAMPLE_SIZES:
+        def train():
+            for model_type, spec in MODEL_SPECS.items():
+                fit_model(model_type, spec.model_class(), cpu_budget, n_samples=n_samples)
+        results[f'training.fit_model.n_{n_samples}'] = summarize(
+            measure(train, repeat=1 if quick else 3, warmup=0),
+            rows=n_samples * len(MODEL_SPECS)
+        )
+    return results
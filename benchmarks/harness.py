@@ -0,0 +1,70 @@
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+
+def measure(fn, repeat=200, warmup=10):
+    """Call fn repeatedly and return the wall-clock duration of each call, in seconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def summarize(samples, rows=1):
+    """Summarize durations as milliseconds percentiles, plus rows per second at the median"""
+    ms = np.asarray(samples) * 1000.0
+    p50 = float(np.percentile(ms, 50))
+    return {
+        'n': len(ms),
+        'rows': rows,
+        'mean_ms': float(ms.mean()),
+        'min_ms': float(ms.min()),
+        'p50_ms': p50,
+        'p90_ms': float(np.percentile(ms, 90)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+        'rows_per_sec': rows * 1000.0 / p50 if p50 else None
+    }
+
+def environment():
+    """Describe the machine and library versions a run was made with"""
+    import sklearn
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+def write_results(results, path):
+    """Write a results document as JSON"""
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def compare(results, baseline, tolerance=0.10, metric='p50_ms'):
+    """Compare benchmarks present in both runs; returns rows of (name, baseline, current, ratio, regressed)"""
+    rows = []
+    for name, current in sorted(results['benchmarks'].items()):
+        previous = baseline['benchmarks'].get(name)
+        if previous is None or not previous.get(metric):
+            continue
+        ratio = current[metric] / previous[metric]
+        rows.append((name, previous[metric], current[metric], ratio, ratio > 1.0 + tolerance))
+    return rows
@@ -0,0 +1,57 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+# Packages importing the app must not pull in; they load with the models, on first use
+HEAVY_PACKAGES = ('sklearn', 'scipy', 'pandas', 'pyarrow', 'tensorflow', 'keras')
+
+def import_profile():
+    """Import the app in a fresh interpreter and return (milliseconds, top-level packages imported)"""
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        # A throwaway database, so the check never touches instance/medical.db
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'import_budget.db')}"
+        env.pop('METRICS_DIR', None)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import app'],
+            env=env, capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing the app failed:\n{result.stderr[-2000:]}")
+
+    total_us = None
+    packages = set()
+    # Lines look like "import time:   self [us] | cumulative | imported package", nested names indented
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        packages.add(name.strip().split('.')[0])
+        if name.rstrip() == ' app':
+            total_us = int(cumulative)
+    return total_us / 1000.0, packages
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.import_budget',
+                                     description='Check how long importing the app takes')
+    parser.add_argument('--budget-ms', type=float, default=1500.0, help='Fail above this import time')
+    parser.add_argument('--repeat', type=int, default=3, help='Imports to time; the fastest counts')
+    args = parser.parse_args(argv)
+
+    runs = [import_profile() for _ in range(args.repeat)]
+    elapsed = min(ms for ms, _ in runs)
+    heavy = sorted(set(HEAVY_PACKAGES) & runs[0][1])
+
+    print(f"import app: {elapsed:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = elapsed > args.budget_ms
+    if heavy:
+        print(f"import app loaded {', '.join(heavy)}; import them where they are used instead")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
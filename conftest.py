@@ -0,0 +1 @@
+# Lets `pytest` import the application packages (models, utils) from the repository root
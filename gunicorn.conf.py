@@ -0,0 +1,18 @@
+# Gunicorn settings, read from the working directory by `gunicorn app:app` (see start.sh)
+import os
+
+# Import the app and load the models once in the master; workers fork with them
+# already in memory, so starting or replacing a worker costs no imports or unpickling
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+def when_ready(server):
+    if preload_app:
+        from app import model_registry
+        model_registry.ensure_loaded()
+
+def post_fork(server, worker):
+    # Database connections the master opened while loading must not be shared with workers
+    if preload_app:
+        from app import app, db
+        with app.app_context():
+            db.engine.dispose(close=False)
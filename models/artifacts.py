@@ -0,0 +1,268 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# fcntl is POSIX-only; without it saves rely on the retrain job check alone
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from models.registry import MODEL_SPECS
+from models.parallel_training import train_models_parallel, fit_model, default_cpu_budget
+from models.datasets import StreamingDataset, datasets_from_env
+from utils.helpers import create_model_directory, validate_model_path
+
+ARTIFACT_DIR = os.getenv('MODEL_ARTIFACT_DIR', os.path.join('models', 'saved'))
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = '.lock'
+# Set to 'r' to memory-map the packed tree arrays so workers share one copy
+MMAP_MODE = os.getenv('MODEL_MMAP_MODE') or None
+# 'compiled' serves predictions from flat node arrays instead of scikit-learn
+ENGINE = os.getenv('MODEL_ENGINE', 'sklearn')
+# Fit the three models concurrently in a process pool instead of one after another
+TRAINING_PARALLEL = os.getenv('TRAINING_PARALLEL', 'false').lower() in ('1', 'true', 'yes')
+
+def file_checksum(filepath):
+    """Compute the SHA-256 checksum of a file"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_manifest(artifact_dir=ARTIFACT_DIR):
+    """Read the current artifact manifest, or None if nothing was built yet"""
+    manifest_path = os.path.join(artifact_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def _write_manifest(manifest, artifact_dir):
+    """Atomically replace the manifest so readers never see a partial file"""
+    manifest_path = os.path.join(artifact_dir, MANIFEST_NAME)
+    tmp_path = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+@contextmanager
+def artifact_lock(artifact_dir=ARTIFACT_DIR):
+    """Hold an exclusive lock on the artifact directory, shared by every process on the host"""
+    create_model_directory(artifact_dir)
+    with open(os.path.join(artifact_dir, LOCK_NAME), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def save_artifacts(models, training_stats, artifact_dir=ARTIFACT_DIR, keep=3):
+    """Save trained models as a new versioned, checksummed artifact set"""
+    # Concurrent saves would otherwise both read version N and both write N + 1
+    with artifact_lock(artifact_dir):
+        return _save_artifacts(models, training_stats, artifact_dir, keep)
+
+def _save_artifacts(models, training_stats, artifact_dir, keep):
+    current = read_manifest(artifact_dir)
+    version = current['version'] + 1 if current else 1
+
+    entries = {}
+    for model_type, model in models.items():
+        filename = f'{model_type}-v{version}.joblib'
+        packed_filename = f'{model_type}-v{version}.packed.joblib'
+
+        # Write to temporary names first so a crash never leaves a truncated artifact
+        for name, packed in ((filename, False), (packed_filename, True)):
+            filepath = os.path.join(artifact_dir, name)
+            tmp_path = f'{filepath}.tmp'
+            model.save(tmp_path, packed=packed)
+            os.replace(tmp_path, filepath)
+
+        entries[model_type] = {
+            'file': filename,
+            'sha256': file_checksum(os.path.join(artifact_dir, filename)),
+            'packed_file': packed_filename,
+            'packed_sha256': file_checksum(os.path.join(artifact_dir, packed_filename)),
+            'model_version': model.version,
+            'accuracy': training_stats[model_type]['accuracy'],
+            'n_samples': training_stats[model_type]['n_samples'],
+            'fast': training_stats[model_type].get('fast')
+        }
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.utcnow().isoformat(),
+        'models': entries
+    }
+    _write_manifest(manifest, artifact_dir)
+    prune_artifacts(manifest, artifact_dir, keep)
+
+    return manifest
+
+def load_artifacts(artifact_dir=ARTIFACT_DIR, mmap_mode=MMAP_MODE, engine=ENGINE, model_types=None):
+    """Load the current artifact set (or only model_types from it), verifying every checksum"""
+    manifest = read_manifest(artifact_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No model artifacts found in {artifact_dir}")
+
+    entries = manifest['models']
+    if model_types is not None:
+        missing = [model_type for model_type in model_types if model_type not in entries]
+        if missing:
+            raise FileNotFoundError(f"No {', '.join(missing)} artifact in {artifact_dir}")
+        entries = {model_type: entries[model_type] for model_type in model_types}
+
+    models = {}
+    training_stats = {}
+    for model_type, entry in entries.items():
+        # Memory-mapped loads use the packed arrays, which processes can share
+        if mmap_mode and 'packed_file' in entry:
+            filename, checksum = entry['packed_file'], entry['packed_sha256']
+        else:
+            filename, checksum = entry['file'], entry['sha256']
+        filepath = os.path.join(artifact_dir, filename)
+        validate_model_path(filepath)
+
+        if file_checksum(filepath) != checksum:
+            raise ValueError(f"Checksum mismatch for {model_type} artifact {filename}")
+
+        model = MODEL_SPECS[model_type].model_class()
+        model.load(filepath, mmap_mode=mmap_mode)
+        model.version = entry['model_version']
+        if engine == 'compiled':
+            model.compile_engine()
+
+        models[model_type] = model
+        training_stats[model_type] = {
+            'accuracy': entry['accuracy'],
+            'n_samples': entry['n_samples'],
+            'fast': entry.get('fast')  # None in manifests written before fast variants
+        }
+
+    return models, training_stats, manifest
+
+class ArtifactWatcher:
+    """Notices artifact versions published by other processes, checking at most every interval seconds"""
+
+    def __init__(self, artifact_dir=ARTIFACT_DIR, interval=5.0):
+        self.artifact_dir = artifact_dir
+        self.interval = interval
+        self._next_check = 0.0
+        self._mtime = None
+
+    def poll(self, current_version):
+        """Return the manifest if it is newer than current_version, else None"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return None
+        self._next_check = now + self.interval
+
+        # A stat call is cheap; only re-read the manifest when the file changed
+        try:
+            mtime = os.stat(os.path.join(self.artifact_dir, MANIFEST_NAME)).st_mtime
+        except FileNotFoundError:
+            return None
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+
+        manifest = read_manifest(self.artifact_dir)
+        if manifest and (current_version is None or manifest['version'] > current_version):
+            return manifest
+        return None
+
+def prune_artifacts(manifest, artifact_dir=ARTIFACT_DIR, keep=3):
+    """Delete artifact files older than the last `keep` versions"""
+    oldest_kept = manifest['version'] - keep + 1
+    for filepath in glob.glob(os.path.join(artifact_dir, '*-v*.joblib')):
+        try:
+            version = int(filepath.rsplit('-v', 1)[1].split('.', 1)[0])
+        except ValueError:
+            continue
+        if version < oldest_kept:
+            os.remove(filepath)
+
+def build_artifacts(artifact_dir=ARTIFACT_DIR, keep=3, parallel=TRAINING_PARALLEL,
+                    cpu_budget=None, datasets=None):
+    """Train all models within a CPU budget and save them as a new artifact version.
+
+    Models with a StreamingDataset in datasets (by default from the
+    TRAINING_DATASET_<MODEL_TYPE> variables) are trained on that file; the
+    rest use the generated sample data.
+    """
+    models = {model_type: spec.model_class() for model_type, spec in MODEL_SPECS.items()}
+    cpu_budget = cpu_budget or default_cpu_budget()
+    if datasets is None:
+        datasets = datasets_from_env(MODEL_SPECS)
+    if parallel:
+        training_stats = train_models_parallel(models, cpu_budget=cpu_budget, datasets=datasets)
+    else:
+        training_stats = {
+            model_type: fit_model(model_type, model, cpu_budget, datasets.get(model_type))[1]
+            for model_type, model in models.items()
+        }
+    manifest = save_artifacts(models, training_stats, artifact_dir, keep)
+    return models, training_stats, manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build and inspect persisted model artifacts')
+    parser.add_argument('command', choices=['build', 'show', 'verify'])
+    parser.add_argument('--artifact-dir', default=ARTIFACT_DIR)
+    parser.add_argument('--if-missing', action='store_true',
+                        help='Only build when no artifacts exist yet')
+    parser.add_argument('--keep', type=int, default=3,
+                        help='Number of artifact versions to keep on disk')
+    parser.add_argument('--parallel', action='store_true', default=TRAINING_PARALLEL,
+                        help='Train the models concurrently in a process pool')
+    parser.add_argument('--cpu-budget', type=int, default=None,
+                        help='Cores training may use (default: TRAINING_CPU_BUDGET or half the machine)')
+    parser.add_argument('--dataset', action='append', default=[], metavar='MODEL_TYPE=PATH',
+                        help='Train a model on a CSV or Parquet file instead of sample data')
+    parser.add_argument('--target-column', default=os.getenv('TRAINING_TARGET_COLUMN', 'target'))
+    parser.add_argument('--chunk-size', type=int, default=int(os.getenv('TRAINING_CHUNK_SIZE', '100000')),
+                        help='Rows read per chunk when streaming datasets')
+    parser.add_argument('--mmap-mode', default=MMAP_MODE,
+                        help="Verify the memory-mapped packed artifacts, e.g. 'r'")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if args.if_missing and read_manifest(args.artifact_dir):
+            print(f"Artifacts already present in {args.artifact_dir}, skipping build")
+            return
+        datasets = None
+        if args.dataset:
+            datasets = {}
+            for spec in args.dataset:
+                model_type, _, path = spec.partition('=')
+                if model_type not in MODEL_SPECS or not path:
+                    parser.error(f"Invalid --dataset {spec!r}, expected MODEL_TYPE=PATH")
+                datasets[model_type] = StreamingDataset(
+                    path, MODEL_SPECS[model_type].feature_columns,
+                    target_column=args.target_column, chunk_size=args.chunk_size
+                )
+        _, training_stats, manifest = build_artifacts(
+            args.artifact_dir, args.keep, parallel=args.parallel,
+            cpu_budget=args.cpu_budget, datasets=datasets
+        )
+        print(f"Built model artifacts version {manifest['version']} in {args.artifact_dir}")
+        for model_type, stats in training_stats.items():
+            print(f"{model_type} model accuracy: {stats['accuracy']:.2f}, fast variant: "
+                  f"{stats['fast']['n_trees']} trees ({stats['fast']['accuracy_delta']:+.3f})")
+    elif args.command == 'verify':
+        _, _, manifest = load_artifacts(args.artifact_dir, args.mmap_mode)
+        print(f"Artifacts version {manifest['version']} verified")
+    else:
+        manifest = read_manifest(args.artifact_dir)
+        print(json.dumps(manifest, indent=2) if manifest else f"No artifacts in {args.artifact_dir}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.artifacts import ARTIFACT_DIR, MMAP_MODE, load_artifacts
+from models.datasets import StreamingDataset
+from models.registry import MODEL_SPECS, LoadedModel
+
+# Chunks each worker may have queued or finished ahead of the writer, bounding memory
+CHUNKS_AHEAD_PER_WORKER = 2
+
+# The model a pool process scores with, loaded once by _init_worker
+_worker_model = None
+
+def load_scoring_model(model_type, artifact_dir=ARTIFACT_DIR, mmap_mode=MMAP_MODE, variant='full'):
+    """Load the current artifact of one model, in the requested variant"""
+    models, training_stats, _ = load_artifacts(artifact_dir, mmap_mode=mmap_mode, model_types=[model_type])
+    loaded = LoadedModel(MODEL_SPECS[model_type], models[model_type], fast=training_stats[model_type].get('fast'))
+    return loaded.variant(variant)
+
+def _init_worker(model_type, artifact_dir, mmap_mode, variant):
+    global _worker_model
+    _worker_model = load_scoring_model(model_type, artifact_dir, mmap_mode, variant)[1]
+
+def _score_chunk(X):
+    """Probabilities for a chunk, NaN for rows with a missing feature"""
+    probabilities = np.full(len(X), np.nan)
+    complete = ~np.isnan(X).any(axis=1)
+    if complete.any():
+        probabilities[complete] = _worker_model.predict_batch(X[complete])
+    return probabilities
+
+class _ResultWriter:
+    """Appends scored chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.is_parquet = path.lower().endswith(('.parquet', '.pq'))
+        self._parquet = None
+        self._header = True
+
+    def write(self, frame):
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+def score_file(model_type, input_path, output_path, chunk_size=50000, workers=None, id_columns=(),
+               variant='full', artifact_dir=ARTIFACT_DIR, mmap_mode=MMAP_MODE, on_chunk=None):
+    """Score every row of a CSV or Parquet file with the saved model, streaming results to output_path.
+
+    The input is read chunk_size rows at a time and chunks are scored by a pool
+    of workers processes (0 scores in this process), each loading the model
+    once. Results are written in input order with the row number, any
+    id_columns, probability and prediction; rows with a missing feature get
+    empty results. Only a few chunks per worker are held in memory, so inputs
+    may be far larger than RAM. on_chunk(X, probabilities), if given, is called
+    with every chunk in order. Returns a summary with rows per second.
+    """
+    if model_type not in MODEL_SPECS:
+        raise ValueError(f"Invalid model type: {model_type}")
+    spec = MODEL_SPECS[model_type]
+    dataset = StreamingDataset(input_path, spec.feature_columns, chunk_size=chunk_size)
+    dataset.validate_schema(require_target=False)
+    missing = [column for column in id_columns if column not in dataset.columns()]
+    if missing:
+        raise ValueError(f"Dataset {input_path} is missing columns: {', '.join(missing)}")
+    columns = list(dict.fromkeys(list(id_columns) + spec.feature_columns))
+
+    if workers is None:
+        # A pool only pays for its process start-up and model loading with cores to spread over
+        workers = os.cpu_count() if (os.cpu_count() or 1) > 1 else 0
+    pool = None
+    if workers:
+        # Spawn rather than fork, as in training: the caller may have threads running
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(model_type, artifact_dir, mmap_mode, variant)
+        )
+    else:
+        _init_worker(model_type, artifact_dir, mmap_mode, variant)
+
+    writer = _ResultWriter(output_path)
+    started = time.perf_counter()
+    n_rows = 0
+    n_scored = 0
+
+    def finish(frame, X, probabilities):
+        nonlocal n_rows, n_scored
+        result = frame[list(id_columns)].copy()
+        result.insert(0, 'row', np.arange(n_rows, n_rows + len(frame)))
+        result['probability'] = probabilities
+        # Nullable booleans, so unscored rows stay empty in the output
+        result['prediction'] = (probabilities >= 0.5).astype(object)
+        result.loc[np.isnan(probabilities), 'prediction'] = None
+        writer.write(result)
+        if on_chunk is not None:
+            on_chunk(X, probabilities)
+        n_rows += len(frame)
+        n_scored += int((~np.isnan(probabilities)).sum())
+
+    try:
+        pending = deque()
+        for frame in dataset.frames(columns):
+            X = frame[spec.feature_columns].to_numpy(dtype=np.float64)
+            if pool is None:
+                finish(frame, X, _score_chunk(X))
+                continue
+            pending.append((frame, X, pool.submit(_score_chunk, X)))
+            # Write the oldest chunk once enough are in flight, keeping output in input order
+            while len(pending) > workers * CHUNKS_AHEAD_PER_WORKER:
+                frame, X, future = pending.popleft()
+                finish(frame, X, future.result())
+        while pending:
+            frame, X, future = pending.popleft()
+            finish(frame, X, future.result())
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'rows': n_rows,
+        'scored': n_scored,
+        'seconds': elapsed,
+        'rows_per_sec': n_rows / elapsed if elapsed else None
+    }
+
+def print_summary(summary):
+    """Print a score_file summary"""
+    print(f"Scored {summary['scored']} of {summary['rows']} rows in {summary['seconds']:.1f} s "
+          f"({summary['rows_per_sec'] or 0:.0f} rows/sec)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m models.bulk_scoring',
+                                     description='Score a CSV or Parquet file with the saved models')
+    parser.add_argument('model_type', choices=list(MODEL_SPECS))
+    parser.add_argument('input', help='CSV or Parquet file with the model feature columns')
+    parser.add_argument('output', help='CSV or Parquet file to write, by extension')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows read and scored per chunk')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Scoring processes (default: one per core, 0: score in this process)')
+    parser.add_argument('--id-column', action='append', default=[], dest='id_columns',
+                        help='Input column copied to the output, e.g. a patient id (repeatable)')
+    parser.add_argument('--variant', choices=['full', 'fast'], default='full')
+    parser.add_argument('--artifact-dir', default=ARTIFACT_DIR)
+    args = parser.parse_args(argv)
+    try:
+        summary = score_file(
+            args.model_type, args.input, args.output, chunk_size=args.chunk_size, workers=args.workers,
+            id_columns=args.id_columns, variant=args.variant, artifact_dir=args.artifact_dir
+        )
+    except (ValueError, FileNotFoundError, ImportError) as e:
+        parser.exit(1, f"Error: {e}\n")
+    print_summary(summary)
+
+if __name__ == '__main__':
+    sys.exit(main())
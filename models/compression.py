@@ -0,0 +1,60 @@
+import copy
+import os
+
+import numpy as np
+
+from models.packed_forest import PackedForest
+
+# Largest drop in test accuracy accepted for the fast variant
+FAST_MAX_ACCURACY_DROP = float(os.getenv('FAST_MAX_ACCURACY_DROP', '0.01'))
+# Sizes tried for the fast variant, as fractions of the full forest's trees
+FAST_TREE_FRACTIONS = (0.1, 0.2, 0.3, 0.5)
+
+def select_fast_trees(forest, batches, max_drop=FAST_MAX_ACCURACY_DROP, fractions=FAST_TREE_FRACTIONS):
+    """Find the fewest leading trees of a fitted forest that stay within max_drop of its accuracy.
+
+    Random forest trees are grown independently, so the first n are a forest in
+    their own right. batches yields scaled (X, y) test data; every tree is run
+    once per batch and the candidate sizes are scored from the running sum.
+    """
+    n_total = len(forest.estimators_)
+    candidates = sorted({max(1, int(n_total * fraction)) for fraction in fractions} | {n_total})
+    correct = np.zeros(len(candidates))
+    n_rows = 0
+
+    for X, y in batches:
+        positive = np.zeros(len(X))
+        checked = 0
+        for i, tree in enumerate(forest.estimators_, start=1):
+            positive += tree.predict_proba(X)[:, 1]
+            if i == candidates[checked]:
+                correct[checked] += np.sum(forest.classes_[(positive / i > 0.5).astype(int)] == y)
+                checked += 1
+        n_rows += len(y)
+
+    if not n_rows:
+        raise ValueError("No test rows to measure the fast variant on")
+    accuracy = correct / n_rows
+    chosen = next(i for i, value in enumerate(accuracy) if value >= accuracy[-1] - max_drop)
+    return {
+        'n_trees': candidates[chosen],
+        'accuracy': float(accuracy[chosen]),
+        'accuracy_delta': float(accuracy[chosen] - accuracy[-1])
+    }
+
+def truncate_forest(forest, n_trees):
+    """A forest made of the first n_trees trees, sharing them with the original"""
+    if isinstance(forest, PackedForest):
+        return forest.truncated(n_trees)
+    truncated = copy.copy(forest)
+    truncated.estimators_ = forest.estimators_[:n_trees]
+    truncated.n_estimators = n_trees
+    return truncated
+
+def truncate_model(model, n_trees):
+    """A copy of a disease model serving only its first n_trees trees, with the same scaler"""
+    truncated = copy.copy(model)
+    truncated.model = truncate_forest(model.model, n_trees)
+    if model.engine is not None:
+        truncated.engine = truncate_forest(model.engine, n_trees)
+    return truncated
@@ -2,6 +2,12 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from collections import defaultdict
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from models.feature_codec import encode_features, decode_features, DEFAULT_CODEC
 
 db = SQLAlchemy()
 
@@ -21,14 +27,199 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
 class Prediction(db.Model):
+    # Serves per-user history pages newest first, with id breaking ties in the keyset cursor
+    __table_args__ = (
+        db.Index('ix_prediction_user_created', 'user_id', 'created_at', 'id'),
+        # Finds outcomes recorded since the last incremental update of a model
+        db.Index('ix_prediction_model_outcome', 'model_type', 'outcome_recorded_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     model_type = db.Column(db.String(50), nullable=False)  # 'diabetes', 'cancer', 'heart'
-    features = db.Column(db.JSON, nullable=False)
+    # Legacy JSON text; rows written or migrated since packed storage hold JSON null here
+    features_json = db.Column('features', db.JSON)
+    features_blob = db.Column(db.LargeBinary)  # Packed little-endian floats, see models/feature_codec.py
+    features_codec = db.Column(db.SmallInteger)
+    features_schema = db.Column(db.SmallInteger)  # FEATURE_SCHEMA_VERSION of the model that scored it
+    variant = db.Column(db.String(10))  # 'full' or 'fast'; null on rows from before model variants
+    outcome = db.Column(db.SmallInteger)  # Confirmed diagnosis (0 or 1), once known
+    outcome_recorded_at = db.Column(db.DateTime)
     prediction = db.Column(db.Float, nullable=False)
     probability = db.Column(db.Float, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @staticmethod
+    def unpack_features(row):
+        """Decode the feature vector of a Prediction or of a row selecting its feature columns"""
+        if row.features_blob is not None:
+            return decode_features(row.features_blob, row.features_codec)
+        return row.features_json
+
+    @staticmethod
+    def pack_row(row, codec=DEFAULT_CODEC):
+        """Turn an insert mapping with a 'features' list into packed feature columns"""
+        row = dict(row)
+        row['features_blob'] = encode_features(row.pop('features'), codec)
+        row['features_codec'] = codec
+        row['features_json'] = None
+        return row
+
+    @property
+    def features(self):
+        return Prediction.unpack_features(self)
+
+    @features.setter
+    def features(self, values):
+        self.features_blob = encode_features(values)
+        self.features_codec = DEFAULT_CODEC
+        self.features_json = None
+
+class PredictionRollup(db.Model):
+    # One row per model and day, kept up to date as predictions are written
+    __table_args__ = (
+        db.UniqueConstraint('model_type', 'day', name='uq_prediction_rollup_model_day'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    model_type = db.Column(db.String(50), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    positives = db.Column(db.Integer, nullable=False, default=0)
+    probability_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+def rollup_deltas(rows):
+    """Aggregate prediction rows into (model_type, day) -> [count, positives, probability_sum]"""
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for row in rows:
+        delta = deltas[(row['model_type'], row['created_at'].date())]
+        delta[0] += 1
+        delta[1] += int(bool(row['prediction']))
+        delta[2] += float(row['probability'])
+    return deltas
+
+def apply_rollup_deltas(deltas):
+    """Add aggregated counts to the rollup table within the current transaction"""
+    values = [
+        {'model_type': model_type, 'day': day, 'count': count,
+         'positives': positives, 'probability_sum': probability_sum}
+        for (model_type, day), (count, positives, probability_sum) in deltas.items()
+    ]
+    if not values:
+        return
+    
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        # Single-statement upsert: concurrent writers never race on creating a day's row
+        insert = (sqlite if dialect == 'sqlite' else postgresql).insert(PredictionRollup.__table__)
+        db.session.execute(insert.values(values).on_conflict_do_update(
+            index_elements=['model_type', 'day'],
+            set_={
+                'count': PredictionRollup.__table__.c['count'] + insert.excluded['count'],
+                'positives': PredictionRollup.__table__.c.positives + insert.excluded.positives,
+                'probability_sum': PredictionRollup.__table__.c.probability_sum + insert.excluded.probability_sum
+            }
+        ))
+        return
+    
+    for value in values:
+        rollup = PredictionRollup.query.filter_by(model_type=value['model_type'], day=value['day']).first()
+        if rollup is None:
+            db.session.add(PredictionRollup(**value))
+        else:
+            rollup.count += value['count']
+            rollup.positives += value['positives']
+            rollup.probability_sum += value['probability_sum']
+
+def save_predictions(rows):
+    """Insert prediction rows in a single bulk statement and update rollups in the same commit"""
+    now = datetime.utcnow()
+    rows = [dict(row, created_at=row.get('created_at') or now) for row in rows]
+    db.session.execute(db.insert(Prediction), [Prediction.pack_row(row) for row in rows])
+    apply_rollup_deltas(rollup_deltas(rows))
+    db.session.commit()
+
+def backfill_rollups(batch_size=5000):
+    """Rebuild the rollup table from existing predictions in one streaming pass.
+
+    Predictions written while the scan runs are not counted, so run it while
+    writes are paused.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(
+                Prediction.id, Prediction.model_type, Prediction.created_at,
+                Prediction.prediction, Prediction.probability
+            )
+            .where(Prediction.id > last_id)
+            .order_by(Prediction.id)
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+        for key, (count, positives, probability_sum) in rollup_deltas(rows).items():
+            delta = deltas[key]
+            delta[0] += count
+            delta[1] += positives
+            delta[2] += probability_sum
+        last_id = rows[-1]['id']
+    
+    db.session.execute(db.delete(PredictionRollup))
+    apply_rollup_deltas(deltas)
+    db.session.commit()
+    return len(deltas)
+
+def migrate_prediction_features(batch_size=1000, vacuum=False):
+    """Re-encode legacy JSON feature vectors as packed blobs, one committed batch at a time.
+
+    Legacy rows predate schema versions, so they are also stamped with the
+    FEATURE_SCHEMA_VERSION of their model type.
+    """
+    from models.registry import MODEL_SPECS
+
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Prediction.id, Prediction.model_type, Prediction.features_json, Prediction.features_blob)
+            .where(
+                db.or_(Prediction.features_blob.is_(None), Prediction.features_schema.is_(None)),
+                Prediction.id > last_id
+            )
+            .order_by(Prediction.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        
+        updates = []
+        for row in rows:
+            update = {'id': row.id}
+            if row.features_blob is None:
+                update.update(
+                    features_blob=encode_features(row.features_json),
+                    features_codec=DEFAULT_CODEC,
+                    features_json=None
+                )
+            if row.model_type in MODEL_SPECS:
+                update['features_schema'] = MODEL_SPECS[row.model_type].schema_version
+            if len(update) > 1:
+                updates.append(update)
+        if updates:
+            db.session.execute(db.update(Prediction), updates)
+        db.session.commit()
+        migrated += len(updates)
+        last_id = rows[-1].id
+    
+    # SQLite only returns the freed pages to the filesystem after a VACUUM
+    if vacuum and db.engine.dialect.name == 'sqlite':
+        with db.engine.connect() as connection:
+            connection.execute(db.text('VACUUM'))
+    
+    return migrated
+
 class ModelMetrics(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     model_type = db.Column(db.String(50), nullable=False)
@@ -36,6 +227,9 @@ class ModelMetrics(db.Model):
     n_samples = db.Column(db.Integer, nullable=False)
     last_trained = db.Column(db.DateTime, default=datetime.utcnow)
     feature_importance = db.Column(db.JSON)
+    # Fast variant: leading trees it serves, and its test accuracy minus the full model's
+    fast_n_trees = db.Column(db.Integer)
+    fast_accuracy_delta = db.Column(db.Float)
 
 class TrainingHistory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -44,13 +238,128 @@ class TrainingHistory(db.Model):
     n_samples = db.Column(db.Integer, nullable=False)
     trained_at = db.Column(db.DateTime, default=datetime.utcnow)
     trained_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    fast_n_trees = db.Column(db.Integer)
+    fast_accuracy_delta = db.Column(db.Float)
+    kind = db.Column(db.String(20))  # 'full' or 'incremental'; null on rows from before increments
+    # Incremental updates: trees grown (and oldest retired), and the outcomes they cover
+    trees_replaced = db.Column(db.Integer)
+    data_until = db.Column(db.DateTime)
+
+class RetrainJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'succeeded', 'failed'
+    mode = db.Column(db.String(20))  # 'full' or 'incremental'
+    started_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    artifact_version = db.Column(db.Integer)
+    stats = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    # True while queued or running, null once finished: the unique index admits one active job,
+    # as every database treats nulls as distinct
+    active = db.Column(db.Boolean, unique=True, index=True)
+
+def claim_retrain_job(started_by, mode, cutoff):
+    """Queue a retrain job unless another is active; returns the new job, or None.
+
+    Active jobs created before cutoff were abandoned by a dead worker and are
+    marked failed first. The unique index on RetrainJob.active rejects a
+    second active job on any database, however concurrent requests interleave.
+    """
+    db.session.execute(
+        db.update(RetrainJob)
+        .where(RetrainJob.active.is_(True), RetrainJob.created_at < cutoff)
+        .values(active=None, status='failed', finished_at=datetime.utcnow(), error='Abandoned: timed out')
+    )
+    db.session.commit()
+    
+    job = RetrainJob(status='queued', started_by=started_by, mode=mode, active=True)
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return None
+    return job
+
+def upgrade_schema():
+    """Add nullable columns and indexes missing from tables created by older versions"""
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                with db.engine.begin() as connection:
+                    connection.execute(db.text(
+                        f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                    ))
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def engine_options(config):
+    """Pool settings of the 'tuned' database profile for the configured database"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    pool = {
+        'pool_size': config.get('DATABASE_POOL_SIZE', 5),
+        'max_overflow': config.get('DATABASE_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DATABASE_POOL_TIMEOUT', 30)
+    }
+    if url.get_backend_name() != 'sqlite':
+        # Recycle before server-side idle timeouts and test connections on checkout
+        return dict(pool, pool_recycle=config.get('DATABASE_POOL_RECYCLE', 1800), pool_pre_ping=True)
+    
+    # sqlite3 waits this long for another writer's lock before raising "database is locked"
+    options = {'connect_args': {
+        'timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000,
+        'check_same_thread': False
+    }}
+    if url.database and url.database != ':memory:':
+        options.update(pool)
+    return options
+
+def _sqlite_pragmas(config):
+    """Connect hook applying the profile's journal, sync and cache pragmas to new SQLite connections"""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers run alongside the single writer; NORMAL syncs at checkpoints only
+        cursor.execute(f"PRAGMA journal_mode={config.get('SQLITE_JOURNAL_MODE', 'WAL')}")
+        cursor.execute(f"PRAGMA synchronous={config.get('SQLITE_SYNCHRONOUS', 'NORMAL')}")
+        cursor.execute(f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+    return on_connect
+
+def pool_stats():
+    """Report connection pool usage of the current engine"""
+    pool = db.engine.pool
+    stats = {
+        'dialect': db.engine.dialect.name,
+        'pool': type(pool).__name__
+    }
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    return stats
 
 def init_db(app):
-    """Initialize the database and create tables"""
+    """Initialize the database, with the configured performance profile, and create tables"""
+    if app.config.get('DATABASE_PROFILE', 'tuned') == 'tuned':
+        # Explicit SQLALCHEMY_ENGINE_OPTIONS still win over the profile
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            **engine_options(app.config),
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        }
     db.init_app(app)
     with app.app_context():
+        if app.config.get('DATABASE_PROFILE', 'tuned') == 'tuned' and db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _sqlite_pragmas(app.config))
         db.create_all()
         
+        # create_all skips existing tables, so add columns and indexes introduced since
+        upgrade_schema()
+        
         # Create admin user if not exists
         admin = User.query.filter_by(username='admin').first()
         if not admin:
@@ -0,0 +1,165 @@
+import os
+from datetime import datetime
+
+import numpy as np
+
+class StreamingDataset:
+    """A CSV or Parquet training file read in fixed-size chunks.
+
+    Rows are assigned to the train or test split by a hash of their row
+    number, so every pass over the file sees the same split without ever
+    holding more than one chunk in memory.
+    """
+
+    def __init__(self, path, feature_columns, target_column='target',
+                 chunk_size=100000, test_size=0.2, seed=42):
+        self.path = path
+        self.feature_columns = list(feature_columns)
+        self.target_column = target_column
+        self.chunk_size = chunk_size
+        self.test_size = test_size
+        self.seed = seed
+
+    @property
+    def is_parquet(self):
+        return self.path.lower().endswith(('.parquet', '.pq'))
+
+    def columns(self):
+        """Return the column names present in the file"""
+        if self.is_parquet:
+            return _parquet_file(self.path).schema_arrow.names
+        import pandas as pd
+        return list(pd.read_csv(self.path, nrows=0).columns)
+
+    def validate_schema(self, require_target=True):
+        """Raise if the file lacks any feature (or target) column the model needs"""
+        required = self.feature_columns + ([self.target_column] if require_target else [])
+        available = set(self.columns())
+        missing = [column for column in required if column not in available]
+        if missing:
+            raise ValueError(f"Dataset {self.path} is missing columns: {', '.join(missing)}")
+
+    def frames(self, columns=None):
+        """Yield pandas DataFrames of at most chunk_size rows"""
+        columns = columns or self.feature_columns + [self.target_column]
+        if self.is_parquet:
+            parquet = _parquet_file(self.path)
+            for batch in parquet.iter_batches(batch_size=self.chunk_size, columns=columns):
+                yield batch.to_pandas()
+        else:
+            import pandas as pd
+            yield from pd.read_csv(self.path, usecols=columns, chunksize=self.chunk_size)
+
+    def chunks(self, split=None):
+        """Yield (X, y) arrays per chunk, restricted to the 'train' or 'test' split if given"""
+        offset = 0
+        for frame in self.frames():
+            # Rows with missing values are skipped, but still count towards row numbers
+            complete = frame.notna().all(axis=1).to_numpy()
+            row_ids = offset + np.flatnonzero(complete)
+            offset += len(frame)
+            frame = frame[complete]
+
+            X = frame[self.feature_columns].to_numpy(dtype=np.float64)
+            y = frame[self.target_column].to_numpy().astype(int)
+            if split is not None:
+                in_test = self.test_mask(row_ids)
+                keep = in_test if split == 'test' else ~in_test
+                X, y = X[keep], y[keep]
+            if len(y):
+                yield X, y
+
+    def test_mask(self, row_ids):
+        """Assign rows to the test split by hashing their row numbers"""
+        hashed = (row_ids.astype(np.uint64) + np.uint64(self.seed)) * np.uint64(0x9E3779B97F4A7C15)
+        return (hashed >> np.uint64(40)).astype(np.float64) / float(1 << 24) < self.test_size
+
+def _parquet_file(path):
+    """Open a Parquet file, which needs the optional pyarrow dependency"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet datasets requires pyarrow (pip install pyarrow)")
+    return pq.ParquetFile(path)
+
+def fit_streaming(model, dataset, n_jobs=None):
+    """Train a model on a StreamingDataset with memory bounded by the chunk size.
+
+    The scaler is fitted incrementally with partial_fit, then the forest is
+    grown chunk by chunk with warm_start, spreading exactly n_estimators trees
+    over the chunks that contain every class. With more such chunks than
+    trees, an evenly spaced sample of them grows one tree each. Accuracy is
+    measured over the streamed test split.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    dataset.validate_schema()
+
+    # Pass 1: scaler statistics and the set of classes over the training rows
+    scaler = StandardScaler()
+    classes = np.array([], dtype=int)
+    chunk_classes = []
+    n_train = 0
+    for X, y in dataset.chunks('train'):
+        scaler.partial_fit(X)
+        chunk_classes.append(np.unique(y))
+        classes = np.union1d(classes, chunk_classes[-1])
+        n_train += len(y)
+    if not chunk_classes:
+        raise ValueError(f"Dataset {dataset.path} has no training rows")
+    if len(classes) < 2:
+        raise ValueError(f"Dataset {dataset.path} has only one class in its training rows")
+
+    # Every warm-started fit must see all classes, or tree outputs won't line up
+    usable = [i for i, chunk in enumerate(chunk_classes) if np.array_equal(chunk, classes)]
+    if not usable:
+        raise ValueError(f"No chunk of {dataset.path} contains every class; use a larger chunk size")
+
+    # Pass 2: grow the forest, giving each usable chunk its share of the trees
+    forest = model._build_model()
+    total_trees = forest.n_estimators
+    shares = {
+        chunk: total_trees * (j + 1) // len(usable) - total_trees * j // len(usable)
+        for j, chunk in enumerate(usable)
+    }
+    forest.set_params(warm_start=True, n_estimators=0, n_jobs=n_jobs)
+    for i, (X, y) in enumerate(dataset.chunks('train')):
+        if not shares.get(i):
+            continue
+        forest.set_params(n_estimators=forest.n_estimators + shares[i])
+        forest.fit(scaler.transform(X), y)
+    forest.set_params(warm_start=False, n_jobs=None)
+
+    model.model = forest
+    model.scaler = scaler
+    model.version = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+    if model.engine is not None:
+        model.compile_engine()
+
+    # Pass 3: accuracy over the test split
+    correct = 0
+    n_test = 0
+    for X, y in dataset.chunks('test'):
+        correct += int((forest.predict(scaler.transform(X)) == y).sum())
+        n_test += len(y)
+    if not n_test:
+        raise ValueError(f"Dataset {dataset.path} has no test rows")
+
+    return {
+        'accuracy': correct / n_test,
+        'n_samples': n_train + n_test
+    }
+
+def datasets_from_env(model_specs):
+    """Build StreamingDatasets from TRAINING_DATASET_<MODEL_TYPE> environment variables"""
+    datasets = {}
+    for model_type, spec in model_specs.items():
+        path = os.getenv(f'TRAINING_DATASET_{model_type.upper()}')
+        if path:
+            datasets[model_type] = StreamingDataset(
+                path,
+                spec.feature_columns,
+                target_column=os.getenv('TRAINING_TARGET_COLUMN', 'target'),
+                chunk_size=int(os.getenv('TRAINING_CHUNK_SIZE', '100000'))
+            )
+    return datasets
@@ -1,14 +1,26 @@
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
+from datetime import datetime
+from models.packed_forest import PackedForest, check_parity, COMPILED_MAX_ROWS
 
 class DiabetesModel:
+    # Bump when FEATURE_COLUMNS change so stored feature vectors can be told apart
+    FEATURE_SCHEMA_VERSION = 1
+    # Column names expected in training datasets, in model input order
+    FEATURE_COLUMNS = [
+        'glucose', 'blood_pressure', 'bmi', 'age',
+        'insulin', 'skin_thickness', 'pregnancies', 'diabetes_pedigree'
+    ]
+    
     def __init__(self):
+        from sklearn.preprocessing import StandardScaler
         self.model = self._build_model()
         self.scaler = StandardScaler()
+        self.version = None  # Training timestamp, set by train() or the artifact store
+        self.engine = None  # Compiled PackedForest used for inference when set
         
     def _build_model(self):
         """Build the diabetes prediction model"""
+        from sklearn.ensemble import RandomForestClassifier
         return RandomForestClassifier(
             n_estimators=100,
             max_depth=10,
@@ -29,29 +41,81 @@ class DiabetesModel:
     def predict(self, features):
         """Make prediction for given features"""
         processed_features = self.preprocess_features(features)
-        prediction = self.model.predict_proba(processed_features)
+        prediction = (self.engine or self.model).predict_proba(processed_features)
         return float(prediction[0][1])  # Return probability of positive class
     
-    def train(self, X_train, y_train):
-        """Train the model with given data"""
+    def preprocess_batch(self, features):
+        """Preprocess a matrix of input features, one row per patient"""
+        features = np.asarray(features, dtype=float)
+        
+        # Scale all rows in a single call if scaler is fitted
+        if hasattr(self.scaler, 'mean_'):
+            features = self.scaler.transform(features)
+        
+        return features
+    
+    def predict_batch(self, features):
+        """Make predictions for many feature rows at once"""
+        processed_features = self.preprocess_batch(features)
+        
+        # The compiled engine wins on small batches; large ones go to scikit-learn when loaded
+        estimator = self.engine or self.model
+        if len(processed_features) > COMPILED_MAX_ROWS and hasattr(self.model, 'fit'):
+            estimator = self.model
+        predictions = estimator.predict_proba(processed_features)
+        return predictions[:, 1]  # Probabilities of positive class, one per row
+    
+    def predict_anytime(self, features, delta=None):
+        """Predict many rows, evaluating trees only until each row's class is settled.
+
+        Runs on the compiled engine, compiling it on first use. Returns the
+        probabilities and the number of trees evaluated for each row.
+        """
+        if self.engine is None:
+            self.compile_engine()
+        return self.engine.predict_anytime(self.preprocess_batch(features), delta=delta)
+    
+    def train(self, X_train, y_train, n_jobs=None):
+        """Train the model with given data, fitting trees on n_jobs cores"""
+        # A memory-mapped PackedForest is read-only, so start from a fresh forest
+        if not hasattr(self.model, 'fit'):
+            self.model = self._build_model()
+        
         # Fit scaler
         self.scaler.fit(X_train)
         X_train_scaled = self.scaler.transform(X_train)
         
-        # Train model
+        # Train model, then drop back to one thread so single-row predictions don't fan out
+        self.model.set_params(n_jobs=n_jobs)
         self.model.fit(X_train_scaled, y_train)
+        self.model.set_params(n_jobs=None)
+        self.version = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+        
+        # Keep a compiled engine in step with the newly fitted forest
+        if self.engine is not None:
+            self.compile_engine()
+    
+    def compile_engine(self):
+        """Compile the fitted forest into flat node arrays for low-latency inference"""
+        if isinstance(self.model, PackedForest):
+            self.engine = self.model
+        else:
+            engine = PackedForest.from_forest(self.model)
+            check_parity(self.model, engine)
+            self.engine = engine
     
     def evaluate(self, X_test, y_test):
         """Evaluate model performance"""
         X_test_scaled = self.scaler.transform(X_test)
         return self.model.score(X_test_scaled, y_test)
     
-    def save(self, filepath):
-        """Save model"""
+    def save(self, filepath, packed=False):
+        """Save model, optionally as uncompressed flat tree arrays for memory-mapping"""
         import joblib
-        joblib.dump((self.model, self.scaler), filepath)
+        model = PackedForest.from_forest(self.model) if packed else self.model
+        joblib.dump((model, self.scaler), filepath)
     
-    def load(self, filepath):
-        """Load model"""
+    def load(self, filepath, mmap_mode=None):
+        """Load model, memory-mapping its arrays when mmap_mode is given"""
         import joblib
-        self.model, self.scaler = joblib.load(filepath) 
\ No newline at end of file
+        self.model, self.scaler = joblib.load(filepath, mmap_mode=mmap_mode) 
\ No newline at end of file
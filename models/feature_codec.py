@@ -0,0 +1,27 @@
+import os
+
+import numpy as np
+
+# Codec ids stored with every packed feature vector
+CODEC_FLOAT64 = 1
+CODEC_FLOAT32 = 2
+
+CODEC_DTYPES = {
+    CODEC_FLOAT64: np.dtype('<f8'),
+    CODEC_FLOAT32: np.dtype('<f4')
+}
+CODEC_NAMES = {
+    'float64': CODEC_FLOAT64,
+    'float32': CODEC_FLOAT32
+}
+
+# float64 keeps submitted values exactly; float32 halves the size at ~7 significant digits
+DEFAULT_CODEC = CODEC_NAMES[os.getenv('FEATURE_STORAGE_CODEC', 'float64')]
+
+def encode_features(values, codec=DEFAULT_CODEC):
+    """Pack a feature vector into little-endian floats"""
+    return np.asarray(values, dtype=CODEC_DTYPES[codec]).tobytes()
+
+def decode_features(blob, codec):
+    """Unpack a feature vector into a list of Python floats"""
+    return np.frombuffer(blob, dtype=CODEC_DTYPES[codec]).astype(float).tolist()
@@ -0,0 +1,109 @@
+import copy
+import os
+from datetime import datetime
+
+import numpy as np
+
+from models.artifacts import ARTIFACT_DIR, load_artifacts, save_artifacts
+
+# Trees grown per increment, as a fraction of the forest; as many of the oldest are retired
+INCREMENTAL_TREE_FRACTION = float(os.getenv('INCREMENTAL_TREE_FRACTION', '0.2'))
+# Fewest labelled rows an increment is worth running on
+INCREMENTAL_MIN_SAMPLES = int(os.getenv('INCREMENTAL_MIN_SAMPLES', '50'))
+
+def rescale_thresholds(forest, old_scaler, new_scaler):
+    """Move every split threshold so the trees make the same decisions on inputs scaled by new_scaler"""
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        internal = tree.children_left != -1
+        feature = tree.feature[internal]
+        threshold = tree.threshold  # a view of the tree's nodes, so assigning to it edits the tree
+        raw = threshold[internal] * old_scaler.scale_[feature] + old_scaler.mean_[feature]
+        threshold[internal] = (raw - new_scaler.mean_[feature]) / new_scaler.scale_[feature]
+
+def update_model(model, X, y, n_jobs=None, tree_fraction=INCREMENTAL_TREE_FRACTION, random_state=None):
+    """Grow new trees on (X, y) with warm_start and retire as many of the oldest ones.
+
+    The scaler absorbs X with partial_fit, and the kept trees' thresholds are
+    moved to match, so the cost depends on the new rows only. New trees get
+    fresh seeds, and the forest is shuffled afterwards so its leading trees (the
+    fast variant, and the order early exit samples in) stay a random mix of
+    old and new. Returns the number of trees replaced.
+    """
+    forest = model.model
+    if not hasattr(forest, 'fit'):
+        raise ValueError("Packed forests are read-only; load the scikit-learn artifact to update it")
+    if not np.array_equal(np.unique(y), forest.classes_):
+        raise ValueError("New data must contain every class the model predicts")
+
+    old_scaler = copy.deepcopy(model.scaler)
+    model.scaler.partial_fit(X)
+    rescale_thresholds(forest, old_scaler, model.scaler)
+
+    n_total = len(forest.estimators_)
+    n_new = max(1, int(n_total * tree_fraction))
+    rng = np.random.default_rng(random_state)
+    # warm_start derives new trees' seeds from random_state after skipping n_total
+    # draws, so a fixed random_state would regrow the same trees every increment
+    seed = forest.random_state
+    forest.set_params(warm_start=True, n_estimators=n_total + n_new, n_jobs=n_jobs,
+                      random_state=int(rng.integers(2 ** 31 - 1)))
+    forest.fit(model.scaler.transform(X), y)
+    forest.set_params(warm_start=False, n_jobs=None, random_state=seed)
+
+    # Retire the oldest trees to keep the forest at its configured size
+    old, new = forest.estimators_[:n_total], forest.estimators_[n_total:]
+    generation = max(getattr(tree, 'generation_', 0) for tree in old) + 1
+    for tree in new:
+        tree.generation_ = generation
+    kept = sorted(old, key=lambda tree: getattr(tree, 'generation_', 0))[n_new:]
+    trees = kept + new
+    forest.estimators_ = [trees[i] for i in rng.permutation(len(trees))]
+    forest.set_params(n_estimators=n_total)
+
+    model.version = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+    if model.engine is not None:
+        model.compile_engine()
+    return n_new
+
+def update_artifacts(labelled, artifact_dir=ARTIFACT_DIR, keep=3, min_samples=INCREMENTAL_MIN_SAMPLES):
+    """Update the current models on newly labelled data and save them as a new artifact version.
+
+    labelled maps model types to (X, y). A fifth of each model's rows is held
+    out to measure the updated model; models with fewer than min_samples rows
+    or a missing class are left as they are. The manifest keeps each model's
+    accuracy and fast variant size from its last full training, as the held-out
+    slice is too small to re-measure them; the forest keeps its size, so the
+    fast tree count still applies. Returns (models, training_stats, manifest, increments), where
+    increments describes each model that changed, with its held-out accuracy.
+    """
+    from sklearn.model_selection import train_test_split
+
+    # The scikit-learn artifacts: packed and memory-mapped forests cannot be refitted
+    models, training_stats, _ = load_artifacts(artifact_dir, mmap_mode=None, engine='sklearn')
+
+    increments = {}
+    for model_type, (X, y) in labelled.items():
+        classes, counts = np.unique(y, return_counts=True)
+        if len(y) < min_samples or len(classes) < 2 or counts.min() < 2:
+            continue
+
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+        model = models[model_type]
+        trees_replaced = update_model(model, X_train, y_train)
+        accuracy = model.evaluate(X_test, y_test)
+
+        training_stats[model_type] = dict(
+            training_stats[model_type],
+            n_samples=training_stats[model_type]['n_samples'] + len(y)
+        )
+        increments[model_type] = {
+            'accuracy': accuracy,
+            'n_samples': len(y),
+            'trees_replaced': trees_replaced
+        }
+
+    if not increments:
+        raise ValueError(f"No model has {min_samples} or more new labelled predictions covering every class")
+    manifest = save_artifacts(models, training_stats, artifact_dir, keep)
+    return models, training_stats, manifest, increments
@@ -0,0 +1,201 @@
+import time
+
+import numpy as np
+
+# Rows scored together per pass, bounding the (rows x trees) node matrix
+ROW_CHUNK_SIZE = 1024
+# Above this many rows scikit-learn's compiled tree walk is faster than the packed one
+COMPILED_MAX_ROWS = 256
+# Trees attributed per pass when explaining; the latency budget is checked between passes
+EXPLAIN_TREE_CHUNK = 10
+# Trees evaluated between early-exit checks in predict_anytime
+ANYTIME_TREE_CHUNK = 10
+
+class PackedForest:
+    """Read-only random forest stored as flat, concatenated node arrays.
+
+    scikit-learn trees copy their nodes when unpickled, so only plain arrays
+    like these are shared between processes when loaded with mmap_mode.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth,
+                 classes, feature_importances, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children  # (n_nodes, 2) left and right child of every node
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.feature_importances_ = feature_importances
+        self.n_features_in_ = n_features
+
+    @classmethod
+    def from_forest(cls, forest):
+        """Pack a fitted RandomForestClassifier into flat node arrays"""
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point back at themselves so every row can take the same number of steps
+            children.append(np.column_stack([
+                np.where(is_leaf, node_ids, tree.children_left),
+                np.where(is_leaf, node_ids, tree.children_right)
+            ]) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+
+            # Normalize leaf values to class probabilities, as DecisionTreeClassifier does
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+            feature_importances=np.asarray(forest.feature_importances_),
+            n_features=forest.n_features_in_
+        )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def truncated(self, n_trees):
+        """A forest of the first n_trees trees, sharing this one's node arrays"""
+        return PackedForest(
+            self.feature, self.threshold, self.children, self.value, self.roots[:n_trees],
+            self.max_depth, self.classes_, self.feature_importances_, self.n_features_in_
+        )
+
+    def predict_proba(self, X):
+        """Average class probabilities over all trees"""
+        # Trees compare float32 inputs against float64 thresholds, like scikit-learn
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features_in_)
+        proba = np.empty((X.shape[0], self.value.shape[1]))
+
+        for start in range(0, X.shape[0], ROW_CHUNK_SIZE):
+            chunk = X[start:start + ROW_CHUNK_SIZE]
+            proba[start:start + len(chunk)] = self.value[self._leaves(chunk)].mean(axis=1)
+
+        return proba
+
+    def _leaves(self, X, roots=None):
+        """Walk every tree (or those starting at roots) for every row at once, returning a (rows, trees) leaf matrix"""
+        flat_X = X.ravel()
+        row_offsets = (np.arange(X.shape[0]) * X.shape[1])[:, None]
+        children = self.children.reshape(-1)
+        node = np.tile(self.roots if roots is None else roots, (X.shape[0], 1))
+
+        # One step per level for all rows and trees; rows already at a leaf stay put
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offsets + self.feature[node]] > self.threshold[node]
+            node = children[2 * node + go_right]
+
+        return node
+
+    def predict_anytime(self, X, threshold=0.5, delta=None, tree_chunk=ANYTIME_TREE_CHUNK):
+        """Positive-class probabilities, evaluating trees only until each row's side of threshold is settled.
+
+        Rows still undecided are scored tree_chunk trees at a time. With delta=None a
+        row stops once the remaining trees could not move its mean across threshold
+        even if they all disagreed, so predictions (probability >= threshold) always
+        match the full forest. With delta, a row stops once the Hoeffding-Serfling
+        bound for sampling trees without replacement puts the full-forest mean on the
+        same side with probability at least 1 - delta, which stops far sooner.
+
+        Returns (mean probability over the trees evaluated, trees evaluated per row).
+        """
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features_in_)
+        positive = self.value[:, 1]
+        n_total = self.n_estimators
+        sums = np.zeros(X.shape[0])
+        used = np.zeros(X.shape[0], dtype=np.int64)
+        active = np.arange(X.shape[0])
+
+        for start in range(0, n_total, tree_chunk):
+            roots = self.roots[start:start + tree_chunk]
+            sums[active] += positive[self._leaves(X[active], roots)].sum(axis=1)
+            used[active] += len(roots)
+            n_seen = start + len(roots)
+            if n_seen == n_total:
+                break
+
+            if delta is None:
+                lower = sums[active] / n_total
+                upper = (sums[active] + n_total - n_seen) / n_total
+                decided = (lower >= threshold) | (upper < threshold)
+            else:
+                margin = np.sqrt((1 - (n_seen - 1) / n_total) * np.log(2 / delta) / (2 * n_seen))
+                decided = np.abs(sums[active] / n_seen - threshold) > margin
+            active = active[~decided]
+            if not len(active):
+                break
+
+        return sums / used, used
+
+    def explain(self, X, deadline=None, tree_chunk=EXPLAIN_TREE_CHUNK):
+        """Split each row's positive-class probability into per-feature contributions.
+
+        Every split on a row's decision path changes the positive-class probability of
+        the node it is in; the change is credited to the split's feature (Saabas), so
+        base + contributions.sum(axis=1) equals predict_proba(X)[:, 1]. Trees are taken
+        tree_chunk at a time, and once time.perf_counter() passes deadline the rest are
+        skipped: the result then averages over the trees evaluated so far.
+
+        Returns (base, contributions of shape (rows, features), number of trees used).
+        """
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features_in_)
+        positive = self.value[:, 1]
+        flat_X = X.ravel()
+        row_offsets = (np.arange(X.shape[0]) * X.shape[1])[:, None]
+        children = self.children.reshape(-1)
+        totals = np.zeros(X.size)
+        base = 0.0
+        n_trees = 0
+
+        for start in range(0, self.n_estimators, tree_chunk):
+            roots = self.roots[start:start + tree_chunk]
+            node = np.tile(roots, (X.shape[0], 1))
+            # Same walk as _leaves; leaves step to themselves and so add nothing
+            for _ in range(self.max_depth):
+                cells = row_offsets + self.feature[node]
+                child = children[2 * node + (flat_X[cells] > self.threshold[node])]
+                totals += np.bincount(cells.ravel(), weights=(positive[child] - positive[node]).ravel(),
+                                      minlength=totals.size)
+                node = child
+            base += positive[roots].sum()
+            n_trees += len(roots)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        return base / n_trees, totals.reshape(X.shape) / n_trees, n_trees
+
+    def predict(self, X):
+        """Predict the most probable class for each row"""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def score(self, X, y):
+        """Mean accuracy on the given data"""
+        return float(np.mean(self.predict(X) == np.asarray(y)))
+
+def check_parity(forest, packed, n_probe=64, atol=1e-9, seed=0):
+    """Raise if the packed forest disagrees with the scikit-learn forest it was built from"""
+    X = np.random.default_rng(seed).normal(size=(n_probe, forest.n_features_in_))
+    error = float(np.abs(forest.predict_proba(X) - packed.predict_proba(X)).max())
+    if error > atol:
+        raise ValueError(f"Compiled forest differs from predict_proba by {error:.3g}")
+    return error
@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from models.registry import MODEL_SPECS
+from models.datasets import fit_streaming
+from models.compression import select_fast_trees
+
+def default_cpu_budget():
+    """Cores training may use by default: half the machine, leaving the rest for serving"""
+    return int(os.getenv('TRAINING_CPU_BUDGET', max(1, (os.cpu_count() or 1) // 2)))
+
+def split_cpu_budget(models, cpu_budget):
+    """Share cores between models in proportion to their tree counts, at least one each"""
+    total_trees = sum(model.model.n_estimators for model in models.values())
+    shares = {
+        model_type: max(1, cpu_budget * model.model.n_estimators // total_trees)
+        for model_type, model in models.items()
+    }
+
+    # Hand cores lost to rounding to the largest forests first
+    spare = cpu_budget - sum(shares.values())
+    for model_type in sorted(models, key=lambda t: -models[t].model.n_estimators):
+        if spare <= 0:
+            break
+        shares[model_type] += 1
+        spare -= 1
+
+    return shares
+
+def fit_model(model_type, model, n_jobs, dataset=None, n_samples=1000):
+    """Train and evaluate one model on its dataset, or on n_samples rows of its registered sample data"""
+    if dataset is not None:
+        stats = fit_streaming(model, dataset, n_jobs=n_jobs)
+        test_batches = ((model.scaler.transform(X), y) for X, y in dataset.chunks('test'))
+    else:
+        X_train, X_test, y_train, y_test = MODEL_SPECS[model_type].generate_data(n_samples)
+        model.train(X_train, y_train, n_jobs=n_jobs)
+        stats = {
+            'accuracy': model.evaluate(X_test, y_test),
+            'n_samples': len(X_train) + len(X_test)
+        }
+        test_batches = [(model.scaler.transform(X_test), y_test)]
+    
+    # The 'fast' variant serves the fewest leading trees that keep accuracy within tolerance
+    stats['fast'] = select_fast_trees(model.model, test_batches)
+    return model, stats
+
+def train_models_parallel(models, cpu_budget=None, datasets=None):
+    """Train a dict of models concurrently in a process pool, within a CPU budget"""
+    datasets = datasets or {}
+    cpu_budget = cpu_budget or default_cpu_budget()
+    shares = split_cpu_budget(models, cpu_budget)
+
+    # Spawn rather than fork: this may run on a thread of a live, multi-threaded server
+    context = multiprocessing.get_context('spawn')
+    training_stats = {}
+    with ProcessPoolExecutor(max_workers=min(len(models), cpu_budget), mp_context=context) as pool:
+        futures = {
+            model_type: pool.submit(
+                fit_model, model_type, model, shares[model_type], datasets.get(model_type)
+            )
+            for model_type, model in models.items()
+        }
+        for model_type, future in futures.items():
+            fitted, stats = future.result()
+
+            # Copy the fitted state back into the caller's instance
+            models[model_type].__dict__.update(fitted.__dict__)
+            training_stats[model_type] = stats
+
+    return training_stats
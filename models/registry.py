@@ -0,0 +1,156 @@
+import threading
+
+import numpy as np
+
+from models.diabetes_model import DiabetesModel
+from models.cancer_model import CancerModel
+from models.heart_model import HeartModel
+from models.packed_forest import PackedForest
+from models.compression import truncate_model, truncate_forest
+from models.sample_data import generate_diabetes_data, generate_cancer_data, generate_heart_data
+
+class ModelSpec:
+    """Static description of a disease model: its class, inputs and sample data"""
+
+    def __init__(self, model_type, model_class, feature_names, generate_data, feature_bounds=None):
+        self.model_type = model_type
+        self.model_class = model_class
+        self.feature_names = list(feature_names)  # display names, in FEATURE_COLUMNS order
+        self.feature_columns = list(model_class.FEATURE_COLUMNS)
+        self.n_features = len(self.feature_columns)
+        self.schema_version = model_class.FEATURE_SCHEMA_VERSION
+        self.generate_data = generate_data
+
+        # Plausible clinical range per feature; None on either side leaves it open
+        feature_bounds = feature_bounds or [(None, None)] * self.n_features
+        self.bounds = (
+            np.array([-np.inf if low is None else low for low, _ in feature_bounds], dtype=np.float64),
+            np.array([np.inf if high is None else high for _, high in feature_bounds], dtype=np.float64)
+        )
+
+# Every model the application trains and serves, in registration order
+MODEL_SPECS = {}
+# Forms a model can be served in: the complete forest, or its compressed leading trees
+MODEL_VARIANTS = ('full', 'fast')
+
+def register_model(model_type, model_class, feature_names, generate_data, feature_bounds=None):
+    """Add a disease model to training, artifacts and the prediction API"""
+    n_features = len(model_class.FEATURE_COLUMNS)
+    if len(feature_names) != n_features or (feature_bounds is not None and len(feature_bounds) != n_features):
+        raise ValueError(f"{model_type} needs a feature name (and bounds, if given) for each of its {n_features} feature columns")
+    spec = ModelSpec(model_type, model_class, feature_names, generate_data, feature_bounds)
+    MODEL_SPECS[model_type] = spec
+    return spec
+
+class LoadedModel:
+    """A loaded model with its spec and the response payloads that only change on retrain"""
+
+    def __init__(self, spec, model, fast=None):
+        self.spec = spec
+        self.model = model
+        # fast is the training stats of the fast variant; without it 'fast' serves the full model
+        self.fast_n_trees = fast['n_trees'] if fast else None
+        self.variants = {'full': model}
+        if fast:
+            self.variants['fast'] = truncate_model(model, fast['n_trees'])
+
+        # scikit-learn recomputes feature_importances_ over every tree on each access
+        importances = getattr(model.model, 'feature_importances_', None)
+        self.feature_importance = None
+        if importances is not None:
+            self.feature_importance = dict(zip(spec.feature_names, np.asarray(importances, dtype=float).tolist()))
+        self._explainer = None
+
+    def variant(self, name):
+        """Return (variant name, model) to serve for a requested variant name"""
+        if name not in MODEL_VARIANTS:
+            raise ValueError(f"Invalid model variant: {name}, expected one of {', '.join(MODEL_VARIANTS)}")
+        if name not in self.variants:
+            name = 'full'
+        return name, self.variants[name]
+
+    def explain(self, features, deadline=None, variant='full'):
+        """Explain the positive-class probability of each row of features, one dict per row"""
+        explainer = self._explainer
+        if explainer is None:
+            # Packed once per model version; a compiled or memory-mapped forest already is one
+            explainer = next((candidate for candidate in (self.model.engine, self.model.model)
+                              if isinstance(candidate, PackedForest)), None)
+            explainer = self._explainer = explainer or PackedForest.from_forest(self.model.model)
+        if variant == 'fast' and self.fast_n_trees:
+            explainer = truncate_forest(explainer, self.fast_n_trees)
+
+        base, contributions, n_trees = explainer.explain(self.model.preprocess_batch(features), deadline=deadline)
+        return [
+            {
+                'base_value': float(base),
+                'contributions': dict(zip(self.spec.feature_names, row)),
+                'trees_used': n_trees,
+                'complete': n_trees == explainer.n_estimators
+            }
+            for row in contributions.tolist()
+        ]
+
+class ModelRegistry:
+    """The models being served, replaced as a whole when new artifacts are installed.
+
+    With a loader, the first get() in a process calls it to load the models,
+    so processes that never predict never import scikit-learn.
+    """
+
+    def __init__(self, loader=None):
+        self._models = {}
+        self._loader = loader
+        self._load_lock = threading.Lock()
+
+    def install(self, models, training_stats=None):
+        """Swap in a complete set of loaded models; readers see either the old set or the new one"""
+        training_stats = training_stats or {}
+        self._models = {
+            model_type: LoadedModel(MODEL_SPECS[model_type], model,
+                                    fast=training_stats.get(model_type, {}).get('fast'))
+            for model_type, model in models.items()
+        }
+
+    def ensure_loaded(self):
+        """Load the models unless a set is installed already, e.g. before the server forked"""
+        if not self._models and self._loader is not None:
+            with self._load_lock:
+                if not self._models:
+                    self._loader()
+
+    def get(self, model_type):
+        """Return the LoadedModel serving model_type"""
+        self.ensure_loaded()
+        loaded = self._models.get(model_type)
+        if loaded is None:
+            raise ValueError(f"Invalid model type: {model_type}")
+        return loaded
+
+    def __contains__(self, model_type):
+        return model_type in self._models
+
+    def __iter__(self):
+        return iter(self._models)
+
+register_model('diabetes', DiabetesModel, [
+    'Glucose', 'Blood Pressure', 'BMI', 'Age',
+    'Insulin', 'Skin Thickness', 'Pregnancies', 'Diabetes Pedigree'
+], generate_diabetes_data, feature_bounds=[
+    (0, 1000), (0, 300), (0, 150), (0, 130),
+    (0, 2000), (0, 150), (0, 30), (0, 5)
+])
+
+register_model('cancer', CancerModel, [
+    'Mean Radius', 'Mean Texture', 'Mean Perimeter', 'Mean Area'
+] + [f'Feature_{i}' for i in range(26)], generate_cancer_data, feature_bounds=[
+    (0, 100), (0, 100), (0, 500), (0, 10000)
+] + [(None, None)] * 26)
+
+register_model('heart', HeartModel, [
+    'Age', 'Resting BP', 'Cholesterol', 'Max Heart Rate', 'ST Depression',
+    'Chest Pain', 'Rest ECG', 'Angina', 'ST Slope', 'Vessels', 'Thal'
+], generate_heart_data, feature_bounds=[
+    (0, 130), (0, 300), (0, 1000), (0, 300), (-10, 10),
+    (0, 3), (0, 2), (0, 1), (0, 2), (0, 4), (0, 3)
+])
@@ -1,5 +1,4 @@
 import numpy as np
-from sklearn.model_selection import train_test_split
 
 def generate_diabetes_data(n_samples=1000):
     """Generate synthetic diabetes dataset"""
@@ -25,6 +24,7 @@ def generate_diabetes_data(n_samples=1000):
     y = (glucose > 140) & (bmi > 30) | (age > 65) & (blood_pressure > 90)
     y = y.astype(int)
     
+    from sklearn.model_selection import train_test_split
     return train_test_split(X, y, test_size=0.2, random_state=42)
 
 def generate_cancer_data(n_samples=1000):
@@ -51,6 +51,7 @@ def generate_cancer_data(n_samples=1000):
     y = (mean_radius > 17) & (mean_area > 650) | (mean_texture > 25)
     y = y.astype(int)
     
+    from sklearn.model_selection import train_test_split
     return train_test_split(X, y, test_size=0.2, random_state=42)
 
 def generate_heart_data(n_samples=1000):
@@ -84,36 +85,5 @@ def generate_heart_data(n_samples=1000):
         ((st_depression > 1.5) & (angina == 1))
     y = y.astype(int)
     
+    from sklearn.model_selection import train_test_split
     return train_test_split(X, y, test_size=0.2, random_state=42)
-
-def train_models(diabetes_model, cancer_model, heart_model):
-    """Train all models with sample data"""
-    # Train diabetes model
-    X_train_diabetes, X_test_diabetes, y_train_diabetes, y_test_diabetes = generate_diabetes_data()
-    diabetes_model.train(X_train_diabetes, y_train_diabetes)
-    diabetes_accuracy = diabetes_model.evaluate(X_test_diabetes, y_test_diabetes)
-    
-    # Train cancer model
-    X_train_cancer, X_test_cancer, y_train_cancer, y_test_cancer = generate_cancer_data()
-    cancer_model.train(X_train_cancer, y_train_cancer)
-    cancer_accuracy = cancer_model.evaluate(X_test_cancer, y_test_cancer)
-    
-    # Train heart disease model
-    X_train_heart, X_test_heart, y_train_heart, y_test_heart = generate_heart_data()
-    heart_model.train(X_train_heart, y_train_heart)
-    heart_accuracy = heart_model.evaluate(X_test_heart, y_test_heart)
-    
-    return {
-        'diabetes': {
-            'accuracy': diabetes_accuracy,
-            'n_samples': len(X_train_diabetes) + len(X_test_diabetes)
-        },
-        'cancer': {
-            'accuracy': cancer_accuracy,
-            'n_samples': len(X_train_cancer) + len(X_test_cancer)
-        },
-        'heart': {
-            'accuracy': heart_accuracy,
-            'n_samples': len(X_train_heart) + len(X_test_heart)
-        }
-    } 
\ No newline at end of file
@@ -1,2 +1,12 @@
-#!/bin/bash
-python -m gunicorn app:app --workers 4 --bind 0.0.0.0:$PORT
\ No newline at end of file
+#!/bin/bash
+python -m models.artifacts build --if-missing
+# Workers share per-process metrics files here; drop the previous run's files
+export METRICS_DIR=${METRICS_DIR:-/tmp/medical-diagnostics-metrics}
+mkdir -p "$METRICS_DIR" && rm -f "$METRICS_DIR"/*.json
+# SERVER_MODE=asgi serves the prediction API from an event loop (see asgi.py)
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    python -m uvicorn asgi:application --workers 4 --host 0.0.0.0 --port $PORT
+else
+    # gunicorn.conf.py loads the models in the master before the workers fork
+    python -m gunicorn app:app --workers 4 --threads ${GUNICORN_THREADS:-1} --bind 0.0.0.0:$PORT
+fi
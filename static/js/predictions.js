@@ -0,0 +1,86 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Prediction history is loaded page by page from the keyset-paginated API
+    const table = document.getElementById('predictionsTable');
+    const body = document.getElementById('predictionsBody');
+    const loadMore = document.getElementById('loadMorePredictions');
+    const empty = document.getElementById('noPredictions');
+    let nextCursor = null;
+
+    async function loadPage() {
+        const params = new URLSearchParams({ limit: PREDICTIONS_PAGE_SIZE });
+        if (nextCursor) {
+            params.set('cursor', nextCursor);
+        }
+
+        loadMore.disabled = true;
+        try {
+            const response = await fetch(`${PREDICTIONS_API}?${params}`);
+            const result = await response.json();
+
+            if (!result.success) {
+                throw new Error(result.error);
+            }
+
+            result.predictions.forEach(prediction => body.appendChild(renderRow(prediction)));
+            nextCursor = result.next_cursor;
+
+            table.classList.toggle('d-none', body.children.length === 0);
+            empty.classList.toggle('d-none', body.children.length > 0);
+            loadMore.classList.toggle('d-none', !nextCursor);
+        } catch (error) {
+            console.error('Error:', error);
+        } finally {
+            loadMore.disabled = false;
+        }
+    }
+
+    function renderRow(prediction) {
+        const row = document.createElement('tr');
+        const created = new Date(prediction.created_at + 'Z');
+        const modelType = prediction.model_type.charAt(0).toUpperCase() + prediction.model_type.slice(1);
+        const badge = prediction.prediction
+            ? '<span class="badge bg-danger">High Risk</span>'
+            : '<span class="badge bg-success">Low Risk</span>';
+
+        row.innerHTML = `
+            <td>${created.toLocaleString()}</td>
+            <td>${modelType}</td>
+            <td>${badge}</td>
+            <td>${(prediction.probability * 100).toFixed(2)}%</td>
+            <td>
+                <button class="btn btn-sm btn-info" type="button">View Features</button>
+                <div class="collapse mt-2">
+                    <div class="card card-body">
+                        <pre class="mb-0"><code>Loading...</code></pre>
+                    </div>
+                </div>
+            </td>`;
+
+        // Feature vectors are only fetched when a row is expanded
+        const button = row.querySelector('button');
+        const collapse = row.querySelector('.collapse');
+        const code = row.querySelector('code');
+        let loaded = false;
+        button.addEventListener('click', async function() {
+            bootstrap.Collapse.getOrCreateInstance(collapse).toggle();
+            if (loaded) {
+                return;
+            }
+            loaded = true;
+            try {
+                const response = await fetch(`${PREDICTIONS_API}/${prediction.id}`);
+                const result = await response.json();
+                code.textContent = JSON.stringify(result.prediction.features, null, 2);
+            } catch (error) {
+                loaded = false;
+                code.textContent = 'Could not load features.';
+                console.error('Error:', error);
+            }
+        });
+
+        return row;
+    }
+
+    loadMore.addEventListener('click', loadPage);
+    loadPage();
+});
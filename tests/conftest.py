@@ -0,0 +1,14 @@
+import pytest
+
+from models.registry import MODEL_SPECS
+
+@pytest.fixture(scope='session')
+def trained_models():
+    """Every registered model trained once on its sample data, with its held-out split"""
+    trained = {}
+    for model_type, spec in MODEL_SPECS.items():
+        X_train, X_test, y_train, y_test = spec.generate_data()
+        model = spec.model_class()
+        model.train(X_train, y_train)
+        trained[model_type] = (model, X_test, y_test)
+    return trained
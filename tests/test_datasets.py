@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.datasets import StreamingDataset, fit_streaming
+from models.heart_model import HeartModel
+from models.sample_data import generate_heart_data
+
+FEATURES = list(HeartModel.FEATURE_COLUMNS)
+N_TREES = 12
+
+class SmallHeartModel(HeartModel):
+    """The heart model with a forest small enough to have fewer trees than chunks"""
+
+    def _build_model(self):
+        return super()._build_model().set_params(n_estimators=N_TREES)
+
+@pytest.fixture(scope='module')
+def heart_frame():
+    X_train, _, y_train, _ = generate_heart_data(1000)
+    frame = pd.DataFrame(X_train, columns=FEATURES)
+    frame['target'] = y_train
+    return frame
+
+@pytest.fixture(params=['csv', 'parquet'])
+def write_dataset(request, tmp_path):
+    """Write a frame in the parametrised format and return its path"""
+    if request.param == 'parquet':
+        pytest.importorskip('pyarrow')
+
+    def write(frame, name='data'):
+        path = str(tmp_path / f'{name}.{request.param}')
+        if request.param == 'parquet':
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
+        return path
+    return write
+
+@pytest.mark.parametrize('chunk_size', [10, 25, 400, 5000])
+def test_forest_size_does_not_depend_on_chunking(heart_frame, write_dataset, chunk_size):
+    dataset = StreamingDataset(write_dataset(heart_frame), FEATURES, chunk_size=chunk_size)
+    model = SmallHeartModel()
+    stats = fit_streaming(model, dataset)
+
+    assert len(model.model.estimators_) == model.model.n_estimators == N_TREES
+    assert stats['n_samples'] == len(heart_frame)
+
+def test_single_class_chunks_do_not_cost_trees(heart_frame, write_dataset):
+    # Sorted by label, only the chunk straddling the boundary has both classes
+    frame = heart_frame.sort_values('target', kind='stable')
+    dataset = StreamingDataset(write_dataset(frame), FEATURES, chunk_size=100)
+    model = SmallHeartModel()
+    fit_streaming(model, dataset)
+
+    assert len(model.model.estimators_) == N_TREES
+    np.testing.assert_array_equal(model.model.classes_, [0, 1])
+
+def test_no_chunk_with_every_class_raises(heart_frame, write_dataset):
+    frame = heart_frame.sort_values('target', kind='stable')
+    n_negative = int((frame['target'] == 0).sum())
+    dataset = StreamingDataset(write_dataset(frame), FEATURES, chunk_size=n_negative)
+    with pytest.raises(ValueError, match='contains every class'):
+        fit_streaming(SmallHeartModel(), dataset)
+
+def test_single_class_dataset_raises(heart_frame, write_dataset):
+    dataset = StreamingDataset(write_dataset(heart_frame[heart_frame['target'] == 0]), FEATURES)
+    with pytest.raises(ValueError, match='only one class'):
+        fit_streaming(SmallHeartModel(), dataset)
+
+def test_missing_columns_raise(heart_frame, write_dataset):
+    dataset = StreamingDataset(write_dataset(heart_frame.drop(columns=[FEATURES[2], 'target'])), FEATURES)
+    with pytest.raises(ValueError, match=f'missing columns: {FEATURES[2]}, target'):
+        fit_streaming(SmallHeartModel(), dataset)
+
+def test_split_is_stable_across_passes_and_chunk_sizes(heart_frame, write_dataset):
+    path = write_dataset(heart_frame)
+
+    def split(chunk_size, name):
+        dataset = StreamingDataset(path, FEATURES, chunk_size=chunk_size)
+        return np.vstack([X for X, _ in dataset.chunks(name)])
+
+    train, test = split(37, 'train'), split(37, 'test')
+    np.testing.assert_array_equal(split(37, 'train'), train)
+    np.testing.assert_array_equal(split(1000, 'train'), train)
+    np.testing.assert_array_equal(split(1000, 'test'), test)
+
+    # Every row lands in exactly one split, about test_size of them in test
+    assert len(train) + len(test) == len(heart_frame)
+    rows = {tuple(row) for row in train}
+    assert not any(tuple(row) in rows for row in test)
+    assert 0.1 < len(test) / len(heart_frame) < 0.3
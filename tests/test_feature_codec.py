@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from models.feature_codec import CODEC_FLOAT32, CODEC_FLOAT64, decode_features, encode_features
+
+def test_float64_round_trip_is_exact():
+    values = [63.0, 145.5, 0.1, 1e-300, -2.5e12, 1 / 3]
+    assert decode_features(encode_features(values, CODEC_FLOAT64), CODEC_FLOAT64) == values
+
+def test_float32_round_trip_to_single_precision():
+    values = [63.0, 145.5, 0.1, 1 / 3]
+    blob = encode_features(values, CODEC_FLOAT32)
+    assert len(blob) == 4 * len(values)
+    decoded = decode_features(blob, CODEC_FLOAT32)
+    assert all(isinstance(value, float) for value in decoded)
+    np.testing.assert_allclose(decoded, values, rtol=1e-7)
+
+@pytest.mark.parametrize('codec', [CODEC_FLOAT64, CODEC_FLOAT32])
+def test_blobs_are_little_endian(codec):
+    blob = encode_features([1.0], codec)
+    assert blob == np.array([1.0], dtype='<f8' if codec == CODEC_FLOAT64 else '<f4').tobytes()
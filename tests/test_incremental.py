@@ -0,0 +1,58 @@
+import copy
+
+import numpy as np
+import pytest
+
+from models.artifacts import save_artifacts
+from models.incremental import rescale_thresholds, update_artifacts, update_model
+from models.registry import MODEL_SPECS
+
+@pytest.mark.parametrize('model_type', list(MODEL_SPECS))
+def test_rescaled_thresholds_keep_decisions(trained_models, model_type):
+    model, X_test, _ = trained_models[model_type]
+    model = copy.deepcopy(model)
+    expected = model.model.predict_proba(model.scaler.transform(X_test))
+
+    old_scaler = copy.deepcopy(model.scaler)
+    model.scaler.partial_fit(X_test * 1.5 + 3.0)
+    rescale_thresholds(model.model, old_scaler, model.scaler)
+
+    # Inputs are compared in float32, so a row within rounding of a threshold may flip one tree
+    proba = model.model.predict_proba(model.scaler.transform(X_test))
+    assert np.abs(proba - expected).max() <= 1 / len(model.model.estimators_) + 1e-12
+    assert np.mean(np.any(proba != expected, axis=1)) <= 0.02
+
+def test_update_mixes_new_trees_and_retires_oldest(trained_models):
+    model, X_test, y_test = trained_models['heart']
+    model = copy.deepcopy(model)
+    n_total = len(model.model.estimators_)
+    original = {id(tree) for tree in model.model.estimators_}
+
+    first = update_model(model, X_test, y_test, random_state=0)
+    trees = model.model.estimators_
+    assert len(trees) == model.model.n_estimators == n_total
+    new = [i for i, tree in enumerate(trees) if id(tree) not in original]
+    assert len(new) == first
+    # Shuffled in, not all at the back or the front
+    assert 0 < np.mean(new) / n_total < 1 and new != list(range(first))
+
+    update_model(model, X_test, y_test, random_state=1)
+    generations = [getattr(tree, 'generation_', 0) for tree in model.model.estimators_]
+    assert generations.count(1) == generations.count(2) == first
+    assert generations.count(0) == n_total - 2 * first
+
+    # Each increment grows trees from fresh seeds
+    seeds = [tree.random_state for tree in model.model.estimators_]
+    assert len(set(seeds)) == n_total
+
+def test_update_artifacts_keeps_full_training_stats(trained_models, tmp_path):
+    model, X_test, y_test = trained_models['heart']
+    fast = {'n_trees': 30, 'accuracy': 0.97, 'accuracy_delta': -0.01}
+    save_artifacts({'heart': model}, {'heart': {'accuracy': 0.98, 'n_samples': 1000, 'fast': fast}}, str(tmp_path))
+
+    _, training_stats, manifest, increments = update_artifacts({'heart': (X_test, y_test)}, str(tmp_path))
+    entry = manifest['models']['heart']
+    assert manifest['version'] == 2
+    assert entry['accuracy'] == 0.98 and entry['fast'] == fast
+    assert entry['n_samples'] == 1000 + len(y_test)
+    assert increments['heart']['n_samples'] == len(y_test) and 0 <= increments['heart']['accuracy'] <= 1
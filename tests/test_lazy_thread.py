@@ -0,0 +1,46 @@
+import os
+import threading
+
+import pytest
+
+from utils.lazy_thread import LazyThread
+
+def test_starts_once_per_process():
+    started = []
+    ready = threading.Event()
+    worker = LazyThread(ready.wait, 'test-worker', on_start=lambda: started.append(os.getpid()))
+    assert not worker.started
+
+    for _ in range(3):
+        worker.start()
+    assert started == [os.getpid()]
+    assert worker.is_alive()
+    ready.set()
+    worker.thread.join(1)
+
+def test_without_target_only_runs_on_start():
+    started = []
+    worker = LazyThread(None, 'test-worker', on_start=lambda: started.append(True))
+    worker.start()
+    assert worker.started and not worker.is_alive() and started == [True]
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_restarts_in_forked_child():
+    stop = threading.Event()
+    worker = LazyThread(stop.wait, 'test-worker')
+    worker.start()
+    parent_thread = worker.thread
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Child: the parent's thread did not survive the fork, so start() must run again
+        was_started = worker.started
+        worker.start()
+        ok = not was_started and worker.is_alive() and worker.thread is not parent_thread
+        os.write(write_end, b'1' if ok else b'0')
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read_end, 1) == b'1'
+    assert worker.thread is parent_thread
+    stop.set()
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from models.packed_forest import PackedForest, ROW_CHUNK_SIZE, COMPILED_MAX_ROWS
+from models.registry import MODEL_SPECS
+
+MODEL_TYPES = list(MODEL_SPECS)
+
+def threshold_rows(forest, base, n_rows=600, seed=0):
+    """Rows that put one feature exactly on a split threshold, or one float32 step either side"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n_rows):
+        tree = forest.estimators_[rng.integers(len(forest.estimators_))].tree_
+        internal = np.flatnonzero(tree.children_left != -1)
+        node = rng.choice(internal)
+        value = np.float32(tree.threshold[node])
+        row = base[rng.integers(len(base))].copy()
+        row[tree.feature[node]] = rng.choice([
+            value, np.nextafter(value, np.float32(-np.inf)), np.nextafter(value, np.float32(np.inf))
+        ])
+        rows.append(row)
+    return np.array(rows)
+
+@pytest.mark.parametrize('model_type', MODEL_TYPES)
+def test_parity_on_test_split(trained_models, model_type):
+    model, X_test, _ = trained_models[model_type]
+    X = model.preprocess_batch(X_test)
+    packed = PackedForest.from_forest(model.model)
+    np.testing.assert_allclose(packed.predict_proba(X), model.model.predict_proba(X), rtol=0, atol=1e-12)
+
+@pytest.mark.parametrize('model_type', MODEL_TYPES)
+def test_parity_on_split_thresholds(trained_models, model_type):
+    model, X_test, _ = trained_models[model_type]
+    X = threshold_rows(model.model, model.preprocess_batch(X_test))
+    packed = PackedForest.from_forest(model.model)
+    np.testing.assert_allclose(packed.predict_proba(X), model.model.predict_proba(X), rtol=0, atol=1e-12)
+
+@pytest.mark.parametrize('model_type', MODEL_TYPES)
+def test_parity_above_chunk_and_compiled_sizes(trained_models, model_type):
+    model, X_test, _ = trained_models[model_type]
+    n_rows = max(ROW_CHUNK_SIZE, COMPILED_MAX_ROWS) * 2 + 7
+    X_raw = X_test[np.random.default_rng(1).integers(0, len(X_test), size=n_rows)]
+    expected = model.model.predict_proba(model.preprocess_batch(X_raw))
+
+    packed = PackedForest.from_forest(model.model)
+    np.testing.assert_allclose(packed.predict_proba(model.preprocess_batch(X_raw)), expected, rtol=0, atol=1e-12)
+
+    # Through the model: compiled engine alongside scikit-learn, and a packed-only (memory-mapped) load
+    model.compile_engine()
+    try:
+        for size in (1, COMPILED_MAX_ROWS, COMPILED_MAX_ROWS + 1, n_rows):
+            np.testing.assert_allclose(model.predict_batch(X_raw[:size]), expected[:size, 1], rtol=0, atol=1e-12)
+        forest = model.model
+        model.model = packed
+        try:
+            np.testing.assert_allclose(model.predict_batch(X_raw), expected[:, 1], rtol=0, atol=1e-12)
+            assert model.predict(X_raw[0].tolist()) == pytest.approx(expected[0, 1], abs=1e-12)
+        finally:
+            model.model = forest
+    finally:
+        model.engine = None
+
+def saabas_reference(forest, x):
+    """Per-feature contributions for one row, walking each scikit-learn tree's decision path"""
+    contributions = np.zeros(len(x))
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        positive = tree.value[:, 0, 1] / tree.value[:, 0].sum(axis=1)
+        path = estimator.decision_path(x[None, :].astype(np.float32)).indices
+        for node, child in zip(path[:-1], path[1:]):
+            contributions[tree.feature[node]] += positive[child] - positive[node]
+    return contributions / len(forest.estimators_)
+
+@pytest.mark.parametrize('model_type', MODEL_TYPES)
+def test_explain_adds_up_to_probability(trained_models, model_type):
+    model, X_test, _ = trained_models[model_type]
+    X = np.vstack([model.preprocess_batch(X_test), threshold_rows(model.model, model.preprocess_batch(X_test), 200)])
+    packed = PackedForest.from_forest(model.model)
+
+    base, contributions, n_trees = packed.explain(X)
+    assert n_trees == packed.n_estimators
+    assert contributions.shape == X.shape
+    np.testing.assert_allclose(base + contributions.sum(axis=1), packed.predict_proba(X)[:, 1], rtol=0, atol=1e-12)
+
+@pytest.mark.parametrize('model_type', MODEL_TYPES)
+def test_explain_matches_decision_paths(trained_models, model_type):
+    model, X_test, _ = trained_models[model_type]
+    X = model.preprocess_batch(X_test[:5])
+    _, contributions, _ = PackedForest.from_forest(model.model).explain(X, tree_chunk=7)
+    for row, x in zip(contributions, X):
+        np.testing.assert_allclose(row, saabas_reference(model.model, x), rtol=0, atol=1e-12)
+
+def test_explain_past_deadline_uses_first_chunk(trained_models):
+    model, X_test, _ = trained_models['heart']
+    X = model.preprocess_batch(X_test[:20])
+    packed = PackedForest.from_forest(model.model)
+
+    base, contributions, n_trees = packed.explain(X, deadline=0.0, tree_chunk=7)
+    assert n_trees == 7
+    expected = packed.truncated(7).explain(X)
+    assert base == pytest.approx(expected[0], abs=1e-12)
+    np.testing.assert_allclose(contributions, expected[1], rtol=0, atol=1e-12)
+
+@pytest.mark.parametrize('model_type', MODEL_TYPES)
+def test_anytime_exact_matches_full_forest(trained_models, model_type):
+    model, X_test, _ = trained_models[model_type]
+    X = np.vstack([model.preprocess_batch(X_test), threshold_rows(model.model, model.preprocess_batch(X_test), 200)])
+    packed = PackedForest.from_forest(model.model)
+    full = packed.predict_proba(X)[:, 1]
+
+    probabilities, used = packed.predict_anytime(X, tree_chunk=7)
+    np.testing.assert_array_equal(probabilities >= 0.5, full >= 0.5)
+    assert used.min() >= 7 and used.max() <= packed.n_estimators
+    assert np.all((used % 7 == 0) | (used == packed.n_estimators))
+    # Each row averages exactly the leading trees it evaluated
+    for n_trees in np.unique(used):
+        rows = used == n_trees
+        np.testing.assert_allclose(probabilities[rows], packed.truncated(n_trees).predict_proba(X[rows])[:, 1],
+                                   rtol=0, atol=1e-12)
+
+@pytest.mark.parametrize('model_type', MODEL_TYPES)
+def test_anytime_hoeffding_stops_sooner(trained_models, model_type):
+    model, X_test, _ = trained_models[model_type]
+    X = model.preprocess_batch(X_test)
+    packed = PackedForest.from_forest(model.model)
+    full = packed.predict_proba(X)[:, 1]
+
+    exact_used = packed.predict_anytime(X)[1]
+    probabilities, used = packed.predict_anytime(X, delta=0.01)
+    assert used.mean() < exact_used.mean()
+    assert np.mean((probabilities >= 0.5) == (full >= 0.5)) >= 0.98
@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+from flask import current_app
+
+# orjson is optional: it parses and serialises several times faster, and handles numpy types natively
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(data):
+    """Parse a JSON request body given as bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _default(obj):
+    """Serialise the numpy values the standard library encoder rejects"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj):
+    """Serialise obj to JSON bytes, including numpy scalars and arrays"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, separators=(',', ':')).encode()
+
+def json_response(obj, status=200):
+    """Build a JSON response without going through Flask's jsonify"""
+    return current_app.response_class(dumps(obj), status=status, mimetype='application/json')
+
+def body_features(body):
+    """Parse a JSON request body and return its 'features' value as a float64 array"""
+    data = loads(body)
+    try:
+        features = np.asarray(data['features'], dtype=np.float64)
+    except (ValueError, TypeError):
+        features = None
+    if features is None or features.ndim == 0:
+        raise ValueError("Features must be a list of numbers, or a list of equal-length rows of numbers")
+    return features
@@ -1,25 +1,67 @@
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-import joblib
 import os
+import base64
+from datetime import datetime
 
-def validate_input_features(features, expected_length, model_type):
+def validate_input_features(features, expected_length, model_type, bounds=None):
     """Validate and preprocess input features"""
-    if not isinstance(features, list):
+    if not isinstance(features, (list, np.ndarray)):
         raise ValueError(f"Features must be a list for {model_type} prediction")
     
     if len(features) != expected_length:
         raise ValueError(f"Expected {expected_length} features for {model_type} prediction, got {len(features)}")
     
     try:
-        features = np.array(features, dtype=float)
+        features = np.asarray(features, dtype=float)
     except (ValueError, TypeError):
         raise ValueError(f"All features must be numeric for {model_type} prediction")
     
+    if features.ndim != 1:
+        raise ValueError(f"All features must be numeric for {model_type} prediction")
+    
+    if bounds is not None:
+        check_feature_bounds(features, bounds, f"{model_type} prediction")
+    
+    return features
+
+def check_feature_bounds(features, bounds, context):
+    """Reject non-finite values and values outside the (lower, upper) bound arrays, in one vectorised pass"""
+    lower, upper = bounds
+    valid = np.isfinite(features) & (features >= lower) & (features <= upper)
+    if not valid.all():
+        position = np.unravel_index(np.argmin(valid), valid.shape)
+        column = position[-1]
+        row = f"row {position[0]}, " if features.ndim == 2 else ""
+        raise ValueError(
+            f"Feature {column} ({row}value {features[position]}) must be finite and between "
+            f"{lower[column]} and {upper[column]} for {context}"
+        )
+
+def validate_batch_features(rows, expected_length, model_type, max_rows=None, bounds=None):
+    """Validate a matrix of input features, one row per patient"""
+    if not isinstance(rows, (list, np.ndarray)) or not len(rows):
+        raise ValueError(f"Features must be a non-empty list of rows for {model_type} batch prediction")
+    
+    if max_rows is not None and len(rows) > max_rows:
+        raise ValueError(f"At most {max_rows} rows allowed per {model_type} batch, got {len(rows)}")
+    
+    try:
+        features = np.asarray(rows, dtype=float)
+    except (ValueError, TypeError):
+        raise ValueError(f"All rows must be equal-length numeric lists for {model_type} batch prediction")
+    
+    if features.ndim != 2 or features.shape[1] != expected_length:
+        raise ValueError(f"Expected rows of {expected_length} features for {model_type} batch prediction")
+    
+    if bounds is not None:
+        check_feature_bounds(features, bounds, f"{model_type} batch prediction")
+    
     return features
 
 def load_scaler(model_type):
     """Load feature scaler if exists"""
+    import joblib
+    from sklearn.preprocessing import StandardScaler
     scaler_path = os.path.join('models', f'{model_type}_scaler.joblib')
     if os.path.exists(scaler_path):
         return joblib.load(scaler_path)
@@ -27,6 +69,7 @@ def load_scaler(model_type):
 
 def save_scaler(scaler, model_type):
     """Save feature scaler"""
+    import joblib
     scaler_path = os.path.join('models', f'{model_type}_scaler.joblib')
     joblib.dump(scaler, scaler_path)
 
@@ -37,15 +80,33 @@ def format_prediction_result(probability):
         'probability': float(probability)
     }
 
+def format_batch_results(probabilities):
+    """Format prediction results for a batch of probabilities"""
+    return [format_prediction_result(float(probability)) for probability in probabilities]
+
 def validate_model_path(model_path):
     """Validate model file path"""
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model file not found at {model_path}")
     return True
 
-def create_model_directory():
+def create_model_directory(path='models/saved'):
     """Create directory for saving models if it doesn't exist"""
-    os.makedirs('models/saved', exist_ok=True)
+    os.makedirs(path, exist_ok=True)
+
+def encode_cursor(created_at, row_id):
+    """Encode a keyset pagination position as an opaque URL-safe token"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a pagination token back into (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
 
 def get_feature_importance(model, feature_names):
     """Get feature importance if available"""
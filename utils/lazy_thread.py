@@ -0,0 +1,47 @@
+import os
+import threading
+
+class LazyThread:
+    """A daemon thread started on first use, once per process.
+
+    A forked child (e.g. a gunicorn worker forked from a preloaded master)
+    inherits the objects but not their threads, so start() compares the
+    process id with the one it started in and starts afresh after a fork.
+    on_start, if given, runs first, to replace state inherited from the
+    parent; target may be None when only that reset is needed.
+    """
+
+    def __init__(self, target, name, on_start=None):
+        self.target = target
+        self.name = name
+        self.on_start = on_start
+        self.thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # Another thread may hold the lock at the moment the process forks
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    @property
+    def started(self):
+        """Whether start() has run in this process"""
+        return self._pid == os.getpid()
+
+    def is_alive(self):
+        return self.started and self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Run on_start and start the thread, unless already done in this process"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                if self.on_start is not None:
+                    self.on_start()
+                self.thread = None
+                if self.target is not None:
+                    self.thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+                    self.thread.start()
+                self._pid = os.getpid()
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
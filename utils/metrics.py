@@ -0,0 +1,171 @@
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.lazy_thread import LazyThread
+
+# Upper bounds in seconds, from sub-millisecond hot-path stages to multi-minute training runs
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0
+)
+
+class Metrics:
+    """Process-local counters and histograms, aggregated across worker processes.
+
+    Each process keeps its samples in memory and, when a directory is
+    configured, a background thread writes them to <directory>/<pid>.json
+    every flush_interval seconds. collect() merges every process's file, so
+    any gunicorn worker can serve totals for the whole server. Files of
+    exited workers are kept so counters never go backwards; clear the
+    directory when the server is restarted.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0, buckets=DEFAULT_BUCKETS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._flusher = LazyThread(self._run if directory else None, 'metrics-flush', on_start=self._reset_samples)
+        atexit.register(self._flush_quietly)
+        # The flush thread may hold the lock at the moment the process forks
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def inc(self, name, amount=1, **labels):
+        """Add amount to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        self._flusher.start()
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record one value in a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.buckets, value)
+        self._flusher.start()
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts (the last one is +Inf), then the sum of values
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += value
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall-clock duration of a block, in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def _reset_samples(self):
+        """Start each process empty: a forked child must not report its parent's samples a second time"""
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except OSError:
+            pass  # a full or missing directory must never take down the worker
+
+    def snapshot(self):
+        """Return this process's samples in a JSON-serialisable form"""
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()]
+            }
+
+    def flush(self):
+        """Atomically write this process's samples to its file in the metrics directory"""
+        if not self.directory or not self._flusher.started:
+            return
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Merge the samples of every process sharing the metrics directory"""
+        if not self.directory:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = []
+            for path in glob.glob(os.path.join(self.directory, '*.json')):
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # replaced or removed mid-read
+
+        counters = {}
+        histograms = {}
+        for snapshot in snapshots:
+            if snapshot['buckets'] != list(self.buckets):
+                continue  # written by a worker with a different bucket layout
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [0] * len(values))
+                histograms[key] = [a + b for a, b in zip(merged, values)]
+        return counters, histograms
+
+    def render(self):
+        """Render the merged samples in the Prometheus text exposition format"""
+        counters, histograms = self.collect()
+        lines = []
+
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f'# TYPE {name} counter')
+            for (sample_name, labels), value in sorted(counters.items()):
+                if sample_name == name:
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f'# TYPE {name} histogram')
+            for (sample_name, labels), values in sorted(histograms.items()):
+                if sample_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), values[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {values[-1]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+        return '\n'.join(lines) + '\n'
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + pairs + '}'
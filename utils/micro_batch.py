@@ -0,0 +1,63 @@
+import queue
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from utils.lazy_thread import LazyThread
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into one batched call.
+
+    Callers block in predict() while a background thread gathers queued rows
+    for up to max_wait_ms or max_batch_size rows, scores them with a single
+    predict_batch(matrix) call and hands each caller its own probability.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=64, max_wait_ms=2.0):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.rows = 0
+        self._queue = None
+        self._worker = LazyThread(self._run, 'micro-batcher', on_start=self._new_queue)
+
+    def predict(self, features):
+        """Score one feature row, sharing a predict_batch call with concurrent callers"""
+        self._worker.start()
+        future = Future()
+        self._queue.put((features, future))
+        return future.result()
+
+    def _new_queue(self):
+        self._queue = queue.Queue()
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                probabilities = self.predict_batch(np.vstack([features for features, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), probability in zip(batch, probabilities):
+                future.set_result(float(probability))
+
+    def _collect(self):
+        """Wait for one request, then gather more until the batch is full or the wait ends"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
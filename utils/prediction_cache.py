@@ -0,0 +1,68 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+class PredictionCache:
+    """Thread-safe LRU cache of prediction probabilities with a time-to-live.
+
+    Keys include the model version, so entries from a replaced model are
+    never returned; clear() drops them eagerly when models are retrained.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_type, version, features):
+        """Build a cache key from the model identity and the validated feature array"""
+        data = np.ascontiguousarray(features, dtype=np.float64).tobytes()
+        return model_type, version, hashlib.blake2b(data, digest_size=16).digest()
+
+    def get(self, key):
+        """Return the cached probability for key, or None on a miss"""
+        if not self.maxsize:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, probability):
+        """Cache a probability, evicting the least recently used entry when full"""
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._entries[key] = (probability, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached prediction"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
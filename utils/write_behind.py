@@ -0,0 +1,128 @@
+import atexit
+import queue
+import time
+from datetime import datetime
+
+from models.database import db, save_predictions
+from utils.lazy_thread import LazyThread
+
+_STOP = object()
+# First wait before retrying a failed flush; it doubles on every further attempt, up to the cap
+RETRY_BACKOFF = 0.1
+RETRY_BACKOFF_MAX = 5.0
+
+class PredictionWriter:
+    """Write-behind buffer that persists Prediction rows in bulk.
+
+    In 'sync' mode rows are committed before the request returns. In 'async'
+    mode they go into a bounded queue drained by a background thread, which
+    inserts them in batches of up to flush_size rows or every flush_interval
+    seconds. A failed batch is retried up to flush_retries times with
+    exponential backoff; meanwhile the queue fills and further rows are
+    written inline. Anything still queued is flushed when the process exits.
+    Background flushes are timed in metrics, when given.
+    """
+
+    def __init__(self, app, mode='sync', max_queue=10000, flush_size=500, flush_interval=0.5,
+                 flush_retries=5, metrics=None):
+        if mode not in ('sync', 'async'):
+            raise ValueError(f"Invalid prediction write mode: {mode}")
+        self.app = app
+        self.mode = mode
+        self.max_queue = max_queue
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.flush_retries = flush_retries
+        self.metrics = metrics
+        self.written = 0
+        self.failed = 0
+        self._queue = None
+        self._flusher = LazyThread(self._run, 'prediction-writer', on_start=self._new_queue)
+        atexit.register(self.close)
+
+    def submit(self, rows):
+        """Persist prediction rows according to the configured durability mode"""
+        # Stamp rows when they are submitted, not when a later batch is flushed
+        now = datetime.utcnow()
+        rows = [dict(row, created_at=row.get('created_at') or now) for row in rows]
+        if self.mode == 'sync':
+            save_predictions(rows)
+            self.written += len(rows)
+            return
+
+        self._flusher.start()
+        for i, row in enumerate(rows):
+            try:
+                self._queue.put(row, timeout=self.flush_interval)
+            except queue.Full:
+                # Never drop audit rows: when the buffer stays full, write the rest inline
+                save_predictions(rows[i:])
+                self.written += len(rows) - i
+                return
+
+    def _new_queue(self):
+        # Rows queued in a parent process before a fork belong to the parent's flush thread
+        self._queue = queue.Queue(maxsize=self.max_queue)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._drain()
+            if batch:
+                self._flush(batch)
+
+    def _drain(self):
+        """Collect queued rows until the batch is full or the flush interval ends"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                row = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if row is _STOP:
+                return batch, True
+            batch.append(row)
+        return batch, False
+
+    def _flush(self, rows):
+        """Bulk insert one batch from the background thread, retrying transient failures"""
+        started = time.perf_counter()
+        backoff = RETRY_BACKOFF
+        for attempt in range(self.flush_retries + 1):
+            with self.app.app_context():
+                try:
+                    save_predictions(rows)
+                except Exception as e:
+                    db.session.rollback()
+                    error = e
+                else:
+                    self.written += len(rows)
+                    if self.metrics:
+                        self.metrics.observe('prediction_flush_seconds', time.perf_counter() - started)
+                        self.metrics.inc('prediction_rows_written_total', len(rows))
+                    return
+
+            if attempt < self.flush_retries:
+                # e.g. "database is locked" while another process writes
+                self.app.logger.warning("Retrying write of %d prediction rows in %.1f s: %s", len(rows), backoff, error)
+                if self.metrics:
+                    self.metrics.inc('prediction_flush_retries_total', exception=type(error).__name__)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, RETRY_BACKOFF_MAX)
+
+        self.failed += len(rows)
+        if self.metrics:
+            self.metrics.inc('prediction_rows_failed_total', len(rows), exception=type(error).__name__)
+        self.app.logger.error("Failed to write %d prediction rows after %d attempts: %r",
+                              len(rows), self.flush_retries + 1, rows, exc_info=error)
+
+    def close(self, timeout=10):
+        """Flush everything still queued and stop the flush thread"""
+        if not self._flusher.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._flusher.thread.join(timeout)